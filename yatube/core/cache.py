@@ -0,0 +1,223 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from zlib import crc32
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.module_loading import import_string
+
+from .metrics import count_cache
+
+MISSING = object()
+
+
+class LocalLRU:
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return MISSING
+            value, expires = item
+            if expires <= time.monotonic():
+                del self._data[key]
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        if timeout is not None:
+            timeout = min(timeout, self.timeout)
+        else:
+            timeout = self.timeout
+        if timeout <= 0:
+            return self.delete(key)
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + timeout)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        l2 = dict(options.get('L2', {}))
+        l2_backend = import_string(
+            l2.get('BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+        )
+        self.l2 = l2_backend(l2.get('LOCATION', location), l2)
+        self.l1 = LocalLRU(
+            int(options.get('L1_MAX_ENTRIES', 1000)),
+            float(options.get('L1_TIMEOUT', 5)),
+        )
+        self.l1_exclude = tuple(options.get('L1_EXCLUDE', ()))
+        self.lock_timeout = float(options.get('LOCK_TIMEOUT', 10))
+        self.lock_poll = float(options.get('LOCK_POLL', 0.05))
+        self.lock_settle = float(options.get('LOCK_SETTLE', 0))
+        self._flights = [threading.Lock() for _ in range(64)]
+
+    def _local_key(self, key, version):
+        if key.startswith(self.l1_exclude):
+            return None
+        return self.make_key(key, version=version)
+
+    def _remember(self, key, value, timeout, version):
+        local_key = self._local_key(key, version)
+        if local_key is not None:
+            self.l1.set(local_key, value, self.get_backend_timeout(timeout))
+
+    def _forget(self, key, version):
+        local_key = self._local_key(key, version)
+        if local_key is not None:
+            self.l1.delete(local_key)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.l2.add(key, value, timeout, version=version)
+        if added:
+            self._remember(key, value, timeout, version)
+        return added
+
+    def get(self, key, default=None, version=None):
+        local_key = self._local_key(key, version)
+        if local_key is not None:
+            value = self.l1.get(local_key)
+            if value is not MISSING:
+                count_cache(True)
+                return value
+        value = self.l2.get(key, MISSING, version=version)
+        count_cache(value is not MISSING)
+        if value is MISSING:
+            return default
+        if local_key is not None:
+            self.l1.set(local_key, value, None)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l2.set(key, value, timeout, version=version)
+        self._remember(key, value, timeout, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.l2.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self._forget(key, version)
+        self.l2.delete(key, version=version)
+
+    def get_many(self, keys, version=None):
+        found = {}
+        remote = []
+        for key in keys:
+            local_key = self._local_key(key, version)
+            value = MISSING if local_key is None else self.l1.get(local_key)
+            if value is MISSING:
+                remote.append(key)
+            else:
+                found[key] = value
+        if remote:
+            fetched = self.l2.get_many(remote, version=version)
+            for key in remote:
+                count_cache(key in fetched)
+            for key, value in fetched.items():
+                local_key = self._local_key(key, version)
+                if local_key is not None:
+                    self.l1.set(local_key, value, None)
+            found.update(fetched)
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.l2.set_many(data, timeout, version=version) or []
+        for key, value in data.items():
+            if key not in failed:
+                self._remember(key, value, timeout, version)
+        return failed
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self._forget(key, version)
+        self.l2.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        local_key = self._local_key(key, version)
+        if local_key is not None and self.l1.get(local_key) is not MISSING:
+            return True
+        return self.l2.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._forget(key, version)
+        return self.l2.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        self._forget(key, version)
+        return self.l2.decr(key, delta, version=version)
+
+    def clear(self):
+        self.l1.clear()
+        self.l2.clear()
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        value = self.get(key, MISSING, version=version)
+        if value is not MISSING:
+            return value
+        if not callable(default):
+            self.add(key, default, timeout, version=version)
+            return self.get(key, default, version=version)
+        lock_key = f'{key}:lock'
+        flight = self._flights[crc32(key.encode()) % len(self._flights)]
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            with flight:
+                value = self.get(key, MISSING, version=version)
+                if value is not MISSING:
+                    return value
+                token = self._acquire(lock_key, version)
+            if token is not None:
+                try:
+                    value = self.l2.get(key, MISSING, version=version)
+                    if value is not MISSING:
+                        return value
+                    return self._fill(key, default, timeout, version)
+                finally:
+                    self._release(lock_key, token, version)
+            if time.monotonic() >= deadline:
+                return self._fill(key, default, timeout, version)
+            time.sleep(self.lock_poll)
+
+    def _acquire(self, lock_key, version):
+        token = uuid.uuid4().hex
+        if not self.l2.add(lock_key, token, self.lock_timeout,
+                           version=version):
+            return None
+        if self.lock_settle:
+            time.sleep(self.lock_settle)
+            if self.l2.get(lock_key, version=version) != token:
+                return None
+        return token
+
+    def _release(self, lock_key, token, version):
+        if self.l2.get(lock_key, version=version) == token:
+            self.l2.delete(lock_key, version=version)
+
+    def _fill(self, key, default, timeout, version):
+        value = default()
+        if value is not None:
+            self.set(key, value, timeout, version=version)
+        return value
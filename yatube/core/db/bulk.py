@@ -0,0 +1,21 @@
+from contextlib import contextmanager
+
+from django.db.models import Max
+
+
+def next_pk(model):
+    top = model._default_manager.aggregate(top=Max('pk'))['top']
+    return (top or 0) + 1
+
+
+@contextmanager
+def manual_timestamps(model, *names):
+    fields = [model._meta.get_field(name) for name in names]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
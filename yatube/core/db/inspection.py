@@ -0,0 +1,102 @@
+import logging
+import os
+import re
+import time
+import traceback
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+IN_LISTS = re.compile(r'\bIN \(%s(?:, %s)*\)', re.IGNORECASE)
+SPACES = re.compile(r'\s+')
+SKIPPED_PATHS = (os.path.dirname(__file__), metrics.__file__, 'site-packages')
+
+
+def normalize(sql):
+    sql = LITERALS.sub('%s', sql)
+    sql = IN_LISTS.sub('IN (...)', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+def origin():
+    root = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()):
+        filename = frame.filename
+        if filename.startswith(root) and not any(
+                path in filename for path in SKIPPED_PATHS):
+            return (f'{os.path.relpath(filename, root)}:{frame.lineno} '
+                    f'in {frame.name}')
+    return 'unknown'
+
+
+class QueryInspector:
+    def __init__(self, slow_ms=None):
+        self.slow_ms = settings.SLOW_QUERY_MS if slow_ms is None else slow_ms
+        self.patterns = Counter()
+        self.origins = {}
+        self.slow = []
+        self._stack = ExitStack()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            pattern = normalize(sql)
+            self.patterns[pattern] += 1
+            if pattern not in self.origins:
+                self.origins[pattern] = origin()
+            if elapsed_ms >= self.slow_ms:
+                where = origin()
+                self.slow.append((pattern, elapsed_ms, where))
+                logger.warning('Медленный запрос %.1f мс (%s): %s',
+                               elapsed_ms, where, pattern)
+
+    def __enter__(self):
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    @property
+    def count(self):
+        return sum(self.patterns.values())
+
+    def repeated(self, threshold=None):
+        threshold = threshold or settings.QUERY_REPEAT_THRESHOLD
+        return [
+            (pattern, count, self.origins[pattern])
+            for pattern, count in self.patterns.most_common()
+            if count >= threshold
+        ]
+
+    def report(self, threshold=None):
+        return '\n'.join(
+            f'{count} x {pattern}\n    {where}'
+            for pattern, count, where in self.repeated(threshold)
+        )
+
+
+class QueryInspectorMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.QUERY_INSPECTION:
+            return self.get_response(request)
+        with QueryInspector() as inspector:
+            response = self.get_response(request)
+        if inspector.repeated():
+            logger.warning('Повторяющиеся запросы (N+1) в %s:\n%s',
+                           request.path, inspector.report())
+        return response
@@ -0,0 +1,64 @@
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PIN_COOKIE = 'db_primary_until'
+
+replica_reads = ContextVar('db_replica_reads', default=False)
+
+
+def pin_primary(request):
+    replica_reads.set(False)
+    request.primary_until = time.time() + settings.REPLICA_PIN_SECONDS
+
+
+def is_pinned(request):
+    try:
+        until = float(request.COOKIES.get(PIN_COOKIE, 0))
+    except ValueError:
+        return False
+    now = time.time()
+    return now < until <= now + settings.REPLICA_PIN_SECONDS
+
+
+class PrimaryPinMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = replica_reads.set(not is_pinned(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            replica_reads.reset(token)
+        until = getattr(request, 'primary_until', None)
+        if until is not None:
+            response.set_cookie(
+                PIN_COOKIE, str(until), max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax')
+        return response
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        replicas = settings.DATABASE_REPLICAS
+        if (not replicas or not replica_reads.get()
+                or model._meta.label not in settings.REPLICA_MODELS):
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        replica_reads.set(False)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        return {obj1._state.db, obj2._state.db} <= databases or None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
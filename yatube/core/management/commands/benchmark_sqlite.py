@@ -0,0 +1,136 @@
+import json
+import random
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+from django.db.models import F
+
+from posts.models import Comment, Post
+
+PROFILES = {
+    'stock': {
+        'ENGINE': 'core.db.backends.sqlite3',
+        'PRAGMAS': {
+            'journal_mode': 'DELETE',
+            'synchronous': 'FULL',
+            'busy_timeout': 5000,
+            'cache_size': -2000,
+            'mmap_size': 0,
+            'temp_store': 'DEFAULT',
+        },
+    },
+    'tuned': {
+        'ENGINE': 'core.db.backends.sqlite3',
+        'PRAGMAS': settings.DATABASES['default'].get('PRAGMAS', {}),
+    },
+}
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает чтение лент при одновременной записи комментариев '
+            'с настройками SQLite по умолчанию и с WAL')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=5)
+
+    def read_feed(self, alias, post_ids, rng):
+        list(Post.objects.using(alias).feed().order_by('-pub_date')[:10])
+        list(Comment.objects.using(alias).filter(
+            post_id=rng.choice(post_ids)).select_related('author')[:20])
+
+    def write_comment(self, alias, post_ids, author_id, rng):
+        post_id = rng.choice(post_ids)
+        with transaction.atomic(using=alias):
+            Comment.objects.using(alias).bulk_create([Comment(
+                post_id=post_id, author_id=author_id, text='Нагрузка')])
+            Post.objects.using(alias).filter(pk=post_id).update(
+                comments_count=F('comments_count') + 1)
+
+    def worker(self, alias, action, deadline, seed, stats):
+        rng = random.Random(seed)
+        timings, errors = [], 0
+        try:
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    action(rng)
+                except OperationalError:
+                    errors += 1
+                    continue
+                timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            connections[alias].close()
+        with stats['lock']:
+            stats['timings'].extend(timings)
+            stats['errors'] += errors
+
+    def summary(self, stats, seconds):
+        timings = sorted(stats['timings'])
+        if not timings:
+            return {'ops': 0, 'errors': stats['errors']}
+        return {
+            'ops_per_second': round(len(timings) / seconds, 1),
+            'p50_ms': round(timings[len(timings) // 2], 3),
+            'p95_ms': round(timings[int(len(timings) * 0.95)], 3),
+            'errors': stats['errors'],
+        }
+
+    def run_profile(self, name, source, options):
+        directory = tempfile.mkdtemp()
+        alias = f'benchmark_{name}'
+        try:
+            path = Path(directory) / 'db.sqlite3'
+            shutil.copyfile(source, path)
+            connections.databases[alias] = {**PROFILES[name], 'NAME': path}
+            posts = Post.objects.using(alias)
+            post_ids = list(posts.values_list('pk', flat=True)[:1000])
+            author_id = posts.values_list('author_id', flat=True).first()
+            connections[alias].close()
+            if not post_ids:
+                raise CommandError('Нет постов для проверки')
+            stats = {
+                role: {'lock': threading.Lock(), 'timings': [], 'errors': 0}
+                for role in ('read', 'write')
+            }
+            actions = [
+                ('read', lambda rng: self.read_feed(alias, post_ids, rng))
+            ] * options['readers'] + [
+                ('write', lambda rng: self.write_comment(
+                    alias, post_ids, author_id, rng))
+            ] * options['writers']
+            deadline = time.monotonic() + options['seconds']
+            threads = [
+                threading.Thread(target=self.worker, args=(
+                    alias, action, deadline, seed, stats[role]))
+                for seed, (role, action) in enumerate(actions)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            return {role: self.summary(stats[role], options['seconds'])
+                    for role in stats}
+        finally:
+            del connections.databases[alias]
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def handle(self, *args, **options):
+        source = settings.DATABASES['default']['NAME']
+        if not Path(source).exists():
+            raise CommandError(f'База {source} не найдена')
+        connections['default'].close()
+        report = {
+            'readers': options['readers'],
+            'writers': options['writers'],
+            **{name: self.run_profile(name, source, options)
+               for name in PROFILES},
+        }
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,35 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Копирует основную базу SQLite в реплики'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Повторять каждые N секунд')
+
+    def sync(self):
+        primary = settings.DATABASES['default']['NAME']
+        source = sqlite3.connect(primary)
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+        finally:
+            source.close()
+
+    def handle(self, *args, **options):
+        while True:
+            self.sync()
+            self.stdout.write(
+                f'Реплики обновлены: {len(settings.DATABASE_REPLICAS)}')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,187 @@
+import math
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+METRICS = (
+    'duration_seconds',
+    'db_queries',
+    'db_seconds',
+    'template_seconds',
+    'cache_hits',
+    'cache_misses',
+    'response_bytes',
+)
+QUANTILES = {'p50': 0.5, 'p95': 0.95, 'p99': 0.99}
+
+current_sample = ContextVar('metrics_sample', default=None)
+
+
+class Sample:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.rendering = 0
+
+    def values(self, response):
+        return {
+            'duration_seconds': time.perf_counter() - self.started,
+            'db_queries': self.db_queries,
+            'db_seconds': self.db_seconds,
+            'template_seconds': self.template_seconds,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'response_bytes': (
+                0 if response.streaming else len(response.content)),
+        }
+
+
+def percentile(ordered, quantile):
+    if not ordered:
+        return 0
+    rank = max(math.ceil(quantile * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class Histogram:
+    def __init__(self, size):
+        self.values = deque(maxlen=size)
+        self.count = 0
+        self.total = 0
+
+    def add(self, value):
+        self.values.append(value)
+        self.count += 1
+        self.total += value
+
+    def summary(self):
+        ordered = sorted(self.values)
+        return {
+            'count': self.count,
+            'sum': self.total,
+            **{name: percentile(ordered, quantile)
+               for name, quantile in QUANTILES.items()},
+        }
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view, values):
+        with self._lock:
+            histograms = self._views.get(view)
+            if histograms is None:
+                histograms = self._views[view] = {
+                    name: Histogram(settings.METRICS_WINDOW)
+                    for name in METRICS
+                }
+            for name, value in values.items():
+                histograms[name].add(value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                view: {
+                    name: histogram.summary()
+                    for name, histogram in histograms.items()
+                }
+                for view, histograms in sorted(self._views.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+registry = Registry()
+
+
+def track_query(execute, sql, params, many, context):
+    sample = current_sample.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.db_queries += 1
+        sample.db_seconds += time.perf_counter() - started
+
+
+def install_query_tracker(sender, connection, **kwargs):
+    if track_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, track_query)
+
+
+def count_cache(hit):
+    sample = current_sample.get()
+    if sample is None:
+        return
+    if hit:
+        sample.cache_hits += 1
+    else:
+        sample.cache_misses += 1
+
+
+@contextmanager
+def template_timer():
+    sample = current_sample.get()
+    if sample is None:
+        yield
+        return
+    sample.rendering += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        sample.rendering -= 1
+        if not sample.rendering:
+            sample.template_seconds += time.perf_counter() - started
+
+
+def prometheus(snapshot):
+    lines = []
+    for name in METRICS:
+        metric = f'yatube_view_{name}'
+        lines.append(f'# TYPE {metric} summary')
+        for view, histograms in snapshot.items():
+            summary = histograms[name]
+            label = f'view="{view}"'
+            for key, quantile in QUANTILES.items():
+                lines.append(
+                    f'{metric}{{{label},quantile="{quantile}"}} '
+                    f'{summary[key]}')
+            lines.append(f'{metric}_sum{{{label}}} {summary["sum"]}')
+            lines.append(f'{metric}_count{{{label}}} {summary["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.METRICS_SAMPLE_RATE
+        if not rate or random.random() >= rate:
+            return self.get_response(request)
+        sample = Sample()
+        token = current_sample.set(sample)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_sample.reset(token)
+        match = request.resolver_match
+        if match is not None:
+            registry.record(match.view_name, sample.values(response))
+        return response
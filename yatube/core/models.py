@@ -0,0 +1,33 @@
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+
+
+class MediaBlobQuerySet(models.QuerySet):
+    def acquire(self, name, count=1):
+        if self.filter(name=name).update(references=F('references') + count):
+            return
+        try:
+            with transaction.atomic():
+                self.create(name=name, references=count)
+        except IntegrityError:
+            self.filter(name=name).update(references=F('references') + count)
+
+    def release(self, name):
+        self.filter(name=name, references__gt=0).update(
+            references=F('references') - 1)
+        return self.filter(name=name, references=0).exists()
+
+
+class MediaBlob(models.Model):
+    name = models.CharField('Файл', max_length=255, unique=True)
+    references = models.PositiveIntegerField('Ссылок', default=0)
+    created = models.DateTimeField('Дата загрузки', auto_now_add=True)
+
+    objects = MediaBlobQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Медиафайл'
+        verbose_name_plural = 'Медиафайлы'
+
+    def __str__(self):
+        return self.name
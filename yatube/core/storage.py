@@ -0,0 +1,34 @@
+import hashlib
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class HashedStorage(FileSystemStorage):
+    hash_algorithm = 'sha256'
+
+    def digest(self, content):
+        hasher = hashlib.new(self.hash_algorithm)
+        for chunk in content.chunks():
+            hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def hashed_name(self, name, digest):
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(directory, digest[:2], f'{digest}{extension}')
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        name = self.hashed_name(name, self.digest(content))
+        if self.exists(name):
+            return name
+        temp_name = super()._save(
+            f'{name}.{uuid.uuid4().hex}.part', content)
+        os.replace(self.path(temp_name), self.path(name))
+        return name
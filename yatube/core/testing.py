@@ -0,0 +1,19 @@
+from contextlib import contextmanager
+
+from .db.inspection import QueryInspector
+
+
+class QueryBudgetMixin:
+    repeat_threshold = None
+
+    @contextmanager
+    def assertQueryBudget(self, budget, repeat_threshold=None):
+        with QueryInspector() as inspector:
+            yield inspector
+        threshold = repeat_threshold or self.repeat_threshold
+        if inspector.repeated(threshold):
+            self.fail('Повторяющиеся запросы (N+1):\n'
+                      + inspector.report(threshold))
+        if inspector.count > budget:
+            self.fail(f'{inspector.count} запросов при бюджете {budget}:\n'
+                      + inspector.report(1))
@@ -0,0 +1,282 @@
+import shutil
+import tempfile
+import threading
+import time
+from contextvars import copy_context
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import (Client, RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.urls import reverse
+
+from posts.cache import bump_versions, request_scopes
+from posts.models import Group, Post
+
+from .cache import TieredCache
+from .db.inspection import QueryInspector, normalize
+from .db.routers import (PIN_COOKIE, PrimaryPinMiddleware, ReplicaRouter,
+                         replica_reads)
+from .metrics import registry
+from .testing import QueryBudgetMixin
+
+User = get_user_model()
+
+FILE_BACKEND = 'django.core.cache.backends.filebased.FileBasedCache'
+
+
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.first = self.make_cache()
+        self.second = self.make_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.location, ignore_errors=True)
+
+    def make_cache(self, **options):
+        options.setdefault('L1_EXCLUDE', ('version:',))
+        options.setdefault('LOCK_SETTLE', 0.01)
+        return TieredCache('', {
+            'OPTIONS': {
+                'L2': {'BACKEND': FILE_BACKEND, 'LOCATION': self.location},
+                **options,
+            },
+        })
+
+    def test_atomic_l2_miss_does_not_sleep(self):
+        """Без LOCK_SETTLE промах не ждёт перепроверки блокировки."""
+        cache = TieredCache('', {'OPTIONS': {'L2': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'settle'}}})
+        with mock.patch('core.cache.time.sleep') as sleep:
+            self.assertEqual(cache.get_or_set('key', lambda: 1), 1)
+        sleep.assert_not_called()
+
+    def test_values_are_shared_through_l2(self):
+        """Значение, записанное одним процессом, видно другому."""
+        self.first.set('key', 'value')
+        self.assertEqual(self.second.get('key'), 'value')
+
+    def test_l1_serves_recent_values(self):
+        """Локальный уровень отдаёт значение без обращения к L2."""
+        self.first.set('key', 'value')
+        self.first.l2.delete('key')
+        self.assertEqual(self.first.get('key'), 'value')
+        self.assertIsNone(self.second.get('key'))
+
+    def test_excluded_keys_bypass_l1(self):
+        """Ключи версий всегда читаются из общего уровня."""
+        self.first.set('version:feed', 1)
+        self.second.get('version:feed')
+        self.first.incr('version:feed')
+        self.assertEqual(self.second.get('version:feed'), 2)
+
+    def test_l1_is_bounded(self):
+        """Локальный уровень хранит не больше L1_MAX_ENTRIES ключей."""
+        cache = self.make_cache(L1_MAX_ENTRIES=2)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key)
+        self.assertEqual(len(cache.l1._data), 2)
+
+    def test_get_or_set_single_flight(self):
+        """При промахе значение вычисляется один раз на ключ."""
+        calls = []
+
+        def build():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'page'
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda cache=cache: results.append(
+                    cache.get_or_set('page', build)))
+            for cache in (self.first, self.second, self.first)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['page'] * 3)
+        self.assertEqual(len(calls), 1)
+
+    def test_slow_fill_does_not_block_other_keys(self):
+        """Долгое вычисление одного ключа не задерживает соседние."""
+        self.first._flights = [threading.Lock()]
+        started = threading.Event()
+
+        def slow():
+            started.set()
+            time.sleep(0.5)
+            return 'slow'
+
+        thread = threading.Thread(
+            target=lambda: self.first.get_or_set('slow', slow))
+        thread.start()
+        started.wait()
+        began = time.monotonic()
+        self.assertEqual(self.first.get_or_set('fast', lambda: 'fast'),
+                         'fast')
+        self.assertLess(time.monotonic() - began, 0.3)
+        thread.join()
+
+
+class SqliteBackendTests(TestCase):
+    def test_pragmas_applied_on_connect(self):
+        """Соединение открывается с прагмами из настроек."""
+        with connection.cursor() as cursor:
+            for name, value in (('synchronous', 1), ('busy_timeout', 5000)):
+                cursor.execute(f'PRAGMA {name}')
+                self.assertEqual(cursor.fetchone()[0], value)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def route(self, *steps):
+        def run():
+            replica_reads.set(True)
+            return [step() for step in steps]
+        return copy_context().run(run)
+
+    def test_feed_models_read_from_replica(self):
+        """Посты и группы читаются с реплики, пользователи — с основной."""
+        self.assertEqual(self.route(
+            lambda: self.router.db_for_read(Post),
+            lambda: self.router.db_for_read(Group),
+            lambda: self.router.db_for_read(User),
+        ), ['replica', 'replica', 'default'])
+
+    def test_reads_after_write_stay_on_primary(self):
+        """После записи чтения в том же запросе идут в основную базу."""
+        self.assertEqual(self.route(
+            lambda: self.router.db_for_write(Post),
+            lambda: self.router.db_for_read(Post),
+        ), ['default', 'default'])
+
+    def test_pinned_context(self):
+        """Вне запроса и в закреплённой сессии чтения идут в основную базу."""
+        self.assertEqual(self.route(
+            lambda: replica_reads.set(False),
+            lambda: self.router.db_for_read(Post),
+        )[1], 'default')
+
+
+class PrimaryPinTests(TestCase):
+    def test_comment_pins_client(self):
+        """Комментарий закрепляет клиента за основной базой через cookie."""
+        user = User.objects.create_user(username='auth')
+        post = Post.objects.create(text='Текст', author=user)
+        client = Client()
+        client.force_login(user)
+        client.post(reverse('posts:add_comment', args=[post.pk]),
+                    {'text': 'Комментарий'})
+        self.assertGreater(float(client.cookies[PIN_COOKIE].value),
+                           time.time())
+
+    def test_middleware_does_not_touch_session(self):
+        """Проверка закрепления не обращается к сессии."""
+        request = RequestFactory().get('/')
+        SessionMiddleware(lambda request: None).process_request(request)
+        response = PrimaryPinMiddleware(lambda request: HttpResponse())(
+            request)
+        self.assertFalse(request.session.accessed)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_recent_bump_reads_primary(self):
+        """Недавно сброшенная страница читается из основной базы."""
+        cache.clear()
+        request = RequestFactory().get('/')
+        token = replica_reads.set(True)
+        try:
+            request_scopes(request, lambda: ['feed'])
+            self.assertTrue(replica_reads.get())
+            bump_versions('feed')
+            request = RequestFactory().get('/')
+            request_scopes(request, lambda: ['feed'])
+            self.assertFalse(replica_reads.get())
+        finally:
+            replica_reads.reset(token)
+
+
+class QueryInspectorTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {index}', author=cls.user) for index in range(6))
+
+    def test_normalize(self):
+        """Литералы и списки IN не различают шаблоны запросов."""
+        self.assertEqual(
+            normalize("SELECT * FROM t WHERE id IN (%s, %s) AND x = 'a'\n"
+                      "LIMIT 21"),
+            'SELECT * FROM t WHERE id IN (...) AND x = %s LIMIT %s')
+
+    def test_repeated_queries_detected(self):
+        """Запросы в цикле распознаются как N+1 с местом вызова."""
+        with QueryInspector() as inspector:
+            for post in Post.objects.all():
+                post.author.username
+        [(pattern, count, where)] = inspector.repeated(threshold=5)
+        self.assertEqual(count, 6)
+        self.assertIn('core/tests.py', where)
+
+    def test_budget_fails_on_n_plus_one(self):
+        """Бюджет запросов не прощает N+1 даже в пределах лимита."""
+        with self.assertRaisesMessage(AssertionError, 'N+1'):
+            with self.assertQueryBudget(100):
+                for post in Post.objects.all():
+                    post.author.username
+
+
+@override_settings(METRICS_SAMPLE_RATE=1)
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.admin = User.objects.create_user(username='admin', is_staff=True)
+        Post.objects.create(text='Текст', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+
+    def test_view_costs_recorded(self):
+        """Для представления записываются запросы, шаблоны и кэш."""
+        self.client.get(reverse('posts:index'))
+        stats = registry.snapshot()['posts:index']
+        self.assertEqual(stats['db_queries']['count'], 1)
+        self.assertGreater(stats['db_queries']['p50'], 0)
+        self.assertGreater(stats['template_seconds']['p99'], 0)
+        self.assertGreater(stats['cache_misses']['sum'], 0)
+        self.assertGreater(stats['response_bytes']['p50'], 0)
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_sampling_disabled(self):
+        """При нулевой частоте выборки ничего не записывается."""
+        self.client.get(reverse('posts:index'))
+        self.assertEqual(registry.snapshot(), {})
+
+    def test_stats_for_staff_only(self):
+        """Статистика доступна только персоналу, в JSON и для Prometheus."""
+        self.client.get(reverse('posts:index'))
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('core:stats'))
+        self.assertEqual(response.status_code, 302)
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('core:stats'))
+        self.assertIn('posts:index', response.json()['views'])
+        response = self.client.get(reverse('core:stats_prometheus'))
+        self.assertContains(
+            response,
+            'yatube_view_db_queries_count{view="posts:index"} 1')
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('', views.stats, name='stats'),
+    path('metrics/', views.stats_prometheus, name='stats_prometheus'),
+]
@@ -1,5 +1,10 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
 
+from .metrics import prometheus, registry
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +20,19 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', {'path': request.path}, status=403)
+
+
+@staff_member_required
+def stats(request):
+    return JsonResponse({
+        'sample_rate': settings.METRICS_SAMPLE_RATE,
+        'views': registry.snapshot(),
+    })
+
+
+@staff_member_required
+def stats_prometheus(request):
+    return HttpResponse(
+        prometheus(registry.snapshot()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Comment, Follow, Group, Post
+from .models import Comment, Follow, Group, Post, TimelineEntry
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -48,7 +48,19 @@ class FollowAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
+class TimelineEntryAdmin(admin.ModelAdmin):
+    list_display = (
+        'user',
+        'post',
+        'pub_date',
+    )
+    list_filter = ('user',)
+    raw_id_fields = ('user', 'post', 'author')
+    empty_value_display = '-пусто-'
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
+admin.site.register(TimelineEntry, TimelineEntryAdmin)
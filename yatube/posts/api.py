@@ -0,0 +1,136 @@
+from functools import wraps
+from http import HTTPStatus
+
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_safe
+
+from .cache import conditional_page
+from .groups import get_group_or_404
+from .models import Post, User
+from .timeline import timeline
+from .utils import (COMMENT_ORDERINGS, FEED_ORDERING, POSTS_PER_PAGE,
+                    CursorPaginator)
+from .views import (comment_scopes, group_scopes, index_scopes,
+                    profile_scopes)
+
+JSON_PARAMS = {'separators': (',', ':'), 'ensure_ascii': False}
+
+
+def with_comments(get_scopes):
+    @wraps(get_scopes)
+    def scopes(*args, **kwargs):
+        found = get_scopes(*args, **kwargs)
+        return found and [*found, 'comments']
+    return scopes
+
+
+def follow_scopes():
+    return ['feed', 'comments']
+
+
+def json_response(data, status=HTTPStatus.OK):
+    return JsonResponse(data, status=status, json_dumps_params=JSON_PARAMS)
+
+
+def json_not_found(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except Http404:
+            return json_response(
+                {'detail': 'Не найдено.'}, HTTPStatus.NOT_FOUND)
+    return wrapper
+
+
+def api_view(get_scopes, per_user=False):
+    def decorator(view):
+        return require_safe(json_not_found(
+            conditional_page(get_scopes, per_user)(view)))
+    return decorator
+
+
+def user_data(user):
+    return {
+        'username': user.username,
+        'name': user.get_full_name(),
+    }
+
+
+def post_data(post):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'author': user_data(post.author),
+        'group': post.group and post.group.slug,
+        'image': post.image.url if post.image else None,
+        'comments': post.comments_count,
+    }
+
+
+def comment_data(comment):
+    return {
+        'id': comment.pk,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+        'parent': comment.parent_id,
+        'author': user_data(comment.author),
+    }
+
+
+def page_link(request, direction, cursor):
+    return cursor and f'{request.path}?{direction}={cursor}'
+
+
+def cursor_page(request, queryset, serialize, ordering=FEED_ORDERING):
+    page = CursorPaginator(queryset, POSTS_PER_PAGE, ordering).page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    return json_response({
+        'results': [serialize(obj) for obj in page],
+        'next': page_link(request, 'after', page.next_cursor),
+        'previous': page_link(request, 'before', page.previous_cursor),
+    })
+
+
+@api_view(with_comments(index_scopes))
+def index(request):
+    return cursor_page(request, Post.objects.feed(), post_data)
+
+
+@api_view(with_comments(group_scopes))
+def group_posts(request, slug):
+    group = get_group_or_404(slug)
+    return cursor_page(request, group.content.feed(), post_data)
+
+
+@api_view(with_comments(profile_scopes))
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    return cursor_page(request, author.posts.feed(), post_data)
+
+
+@api_view(follow_scopes, per_user=True)
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return json_response(
+            {'detail': 'Требуется авторизация.'}, HTTPStatus.UNAUTHORIZED)
+    return cursor_page(request, timeline(request.user),
+                       lambda entry: post_data(entry.post))
+
+
+@api_view(comment_scopes)
+def post_detail(request, post_id):
+    post = get_object_or_404(Post.objects.feed(), pk=post_id)
+    return json_response(post_data(post))
+
+
+@api_view(comment_scopes)
+def comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    return cursor_page(
+        request, post.comments.select_related('author'), comment_data,
+        ordering=COMMENT_ORDERINGS['oldest'])
@@ -0,0 +1,157 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+from http import HTTPStatus
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.utils.cache import get_conditional_response, quote_etag
+
+from users.models import get_profile
+
+from .cache import (PAGE_KEY, PAGE_TIMEOUT, get_versions, request_fingerprint,
+                    request_scopes)
+from .forms import CommentForm
+from .groups import get_group_or_404
+from .models import Follow, Post, User
+from .utils import paginator
+from .views import (comment_page, group_scopes, index_scopes,
+                    post_detail_scopes, profile_scopes)
+
+
+@lru_cache(maxsize=None)
+def executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.ASYNC_DB_WORKERS,
+        thread_name_prefix='orm',
+    )
+
+
+def _call(func, args, kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run(func, *args, **kwargs):
+    call = sync_to_async(_call, thread_sensitive=False, executor=executor())
+    return await call(func, args, kwargs)
+
+
+def page_fingerprint(request, get_scopes, args, kwargs):
+    scopes = request_scopes(request, get_scopes, *args, **kwargs)
+    if scopes is None:
+        return None
+    return request_fingerprint(request, get_versions('site', *scopes))
+
+
+def async_feed_page(get_scopes, cache_page=True):
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            fingerprint = None
+            if request.method in ('GET', 'HEAD'):
+                fingerprint = await run(
+                    page_fingerprint, request, get_scopes, args, kwargs)
+            if fingerprint is None:
+                return await view(request, *args, **kwargs)
+            etag = quote_etag(fingerprint)
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                return response
+            key = PAGE_KEY.format(fingerprint)
+            content = await run(cache.get, key) if cache_page else None
+            if content is not None:
+                response = HttpResponse(content)
+            else:
+                response = await view(request, *args, **kwargs)
+                if cache_page and response.status_code == HTTPStatus.OK:
+                    await run(cache.set, key, response.content, PAGE_TIMEOUT)
+            response.setdefault('ETag', etag)
+            return response
+        return wrapper
+    return decorator
+
+
+def load_page(queryset, request):
+    context = paginator(queryset, request)
+    page_obj = context['page_obj']
+    page_obj.object_list = list(page_obj.object_list)
+    return context
+
+
+def load_author(username):
+    author = get_object_or_404(
+        User.objects.select_related('profile'), username=username)
+    get_profile(author)
+    return author
+
+
+def load_post(post_id):
+    post = get_object_or_404(
+        Post.objects.select_related('author__profile', 'group'), pk=post_id)
+    get_profile(post.author)
+    return post
+
+
+def is_following(request, username):
+    return request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author__username=username).exists()
+
+
+@async_feed_page(index_scopes)
+async def index(request):
+    context = await run(load_page, Post.objects.feed(), request)
+    return await run(render, request, 'posts/index.html', context)
+
+
+@async_feed_page(group_scopes)
+async def group_posts(request, slug):
+    group, context = await asyncio.gather(
+        run(get_group_or_404, slug),
+        run(load_page, Post.objects.feed().filter(group__slug=slug),
+            request),
+    )
+    context['group'] = group
+    return await run(render, request, 'posts/group_list.html', context)
+
+
+@async_feed_page(profile_scopes)
+async def profile(request, username):
+    author, context, following = await asyncio.gather(
+        run(load_author, username),
+        run(load_page, Post.objects.feed().filter(author__username=username),
+            request),
+        run(is_following, request, username),
+    )
+    context.update({
+        'count': author.profile.posts_count,
+        'author': author,
+        'following': following,
+    })
+    return await run(render, request, 'posts/profile.html', context)
+
+
+@async_feed_page(post_detail_scopes, cache_page=False)
+async def post_detail(request, post_id):
+    post, comments = await asyncio.gather(
+        run(load_post, post_id),
+        run(comment_page, request, post_id),
+    )
+    context = {
+        'post': post,
+        'post_title': post.text[:30],
+        'author': post.author,
+        'author_posts': post.author.profile.posts_count,
+        'pub_date': post.pub_date,
+        'form': CommentForm(
+            initial={'parent': request.GET.get('reply_to')}),
+        **comments,
+    }
+    return await run(render, request, 'posts/post_detail.html', context)
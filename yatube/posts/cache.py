@@ -0,0 +1,131 @@
+import hashlib
+import time
+from functools import wraps
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.views.decorators.http import condition
+
+from core.db.routers import replica_reads
+
+VERSION_KEY = 'posts:version:{}'
+BUMPED_KEY = 'posts:bumped:{}'
+PAGE_KEY = 'posts:page:{}'
+PAGE_TIMEOUT = 60 * 60 * 24
+
+
+def version_key(scope):
+    return VERSION_KEY.format(scope)
+
+
+def get_versions(*scopes):
+    keys = [version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if versions.get(key) is None:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*scopes):
+    for scope in scopes:
+        key = version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+    if settings.DATABASE_REPLICAS:
+        cache.set_many({BUMPED_KEY.format(scope): True for scope in scopes},
+                       settings.REPLICA_PIN_SECONDS)
+
+
+def read_primary_after_bump(scopes):
+    if not settings.DATABASE_REPLICAS or not replica_reads.get():
+        return
+    keys = [BUMPED_KEY.format(scope) for scope in ('site', *scopes)]
+    if cache.get_many(keys):
+        replica_reads.set(False)
+
+
+def card_scopes(post):
+    scopes = [f'post:{post.pk}', f'user:{post.author_id}']
+    if post.group_id:
+        scopes.append(f'group:{post.group_id}')
+    return scopes
+
+
+def post_feed_scopes(post, group_id=None):
+    scopes = ['feed', f'feed:author:{post.author_id}']
+    for pk in {post.group_id, group_id}:
+        if pk:
+            scopes.append(f'feed:group:{pk}')
+    return scopes
+
+
+def request_fingerprint(request, versions):
+    raw = '|'.join([
+        request.get_full_path(),
+        str(request.user.pk),
+        *map(str, versions),
+    ])
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def page_key(request, versions):
+    return PAGE_KEY.format(request_fingerprint(request, versions))
+
+
+def request_scopes(request, get_scopes, *args, **kwargs):
+    known = request.__dict__.setdefault('_feed_scopes', {})
+    if get_scopes not in known:
+        known[get_scopes] = get_scopes(*args, **kwargs)
+        if known[get_scopes] is not None:
+            read_primary_after_bump(known[get_scopes])
+    return known[get_scopes]
+
+
+def etag_for(get_scopes, per_user=False):
+    def etag(request, *args, **kwargs):
+        if per_user and not request.user.is_authenticated:
+            return None
+        scopes = request_scopes(request, get_scopes, *args, **kwargs)
+        if scopes is None:
+            return None
+        if per_user:
+            scopes = [*scopes, f'feed:author:{request.user.pk}']
+            read_primary_after_bump(scopes)
+        return request_fingerprint(request, get_versions('site', *scopes))
+    return etag
+
+
+def conditional_page(get_scopes, per_user=False):
+    return condition(etag_func=etag_for(get_scopes, per_user))
+
+
+def cache_feed_page(get_scopes):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            scopes = None
+            if request.method in ('GET', 'HEAD'):
+                scopes = request_scopes(request, get_scopes, *args, **kwargs)
+            if scopes is None:
+                return view(request, *args, **kwargs)
+            key = page_key(request, get_versions('site', *scopes))
+            response = None
+
+            def render_page():
+                nonlocal response
+                response = view(request, *args, **kwargs)
+                if response.status_code == HTTPStatus.OK:
+                    return response.content
+
+            content = cache.get_or_set(key, render_page, PAGE_TIMEOUT)
+            if response is not None:
+                return response
+            return HttpResponse(content)
+        return wrapper
+    return decorator
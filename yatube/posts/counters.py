@@ -0,0 +1,29 @@
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_of(model, field, outer='pk'):
+    counts = model.objects.filter(**{field: OuterRef(outer)}).order_by()
+    counts = counts.values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def recount_posts(Post, Comment):
+    return Post.objects.update(comments_count=count_of(Comment, 'post'))
+
+
+def recount_groups(Group, Post):
+    return Group.objects.update(posts_count=count_of(Post, 'group'))
+
+
+def recount_profiles(Profile, User, Post, Follow):
+    missing = User.objects.filter(profile__isnull=True).values_list(
+        'pk', flat=True)
+    Profile.objects.bulk_create(
+        Profile(user_id=pk) for pk in missing.iterator()
+    )
+    return Profile.objects.update(
+        posts_count=count_of(Post, 'author', 'user'),
+        followers_count=count_of(Follow, 'author', 'user'),
+        following_count=count_of(Follow, 'user', 'user'),
+    )
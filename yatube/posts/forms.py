@@ -1,17 +1,66 @@
-from django.forms import ModelForm
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.forms import HiddenInput, ModelChoiceField, ModelForm, Select
+from django.forms.models import ModelChoiceIterator
 
+from .groups import registry
+from .images import process_upload
 from .models import Comment, Post
 
 
+class GroupChoiceIterator(ModelChoiceIterator):
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for group in registry.all():
+            yield self.choice(group)
+
+    def __len__(self):
+        return len(registry.all()) + (self.field.empty_label is not None)
+
+
+class GroupChoiceField(ModelChoiceField):
+    iterator = GroupChoiceIterator
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            group = registry.get(int(value))
+        except (TypeError, ValueError):
+            group = None
+        if group is None:
+            raise ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+        return group
+
+
 class PostForm(ModelForm):
     class Meta:
         model = Post
         fields = ['text', 'group', 'image']
+        field_classes = {'group': GroupChoiceField}
+        widgets = {'group': Select(attrs={'class': 'form-control'})}
+
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            return process_upload(image)
+        return image
 
 
 class CommentForm(ModelForm):
     class Meta:
         model = Comment
-        fields = ['text']
+        fields = ['text', 'parent']
         label = {'text': 'Текст'}
         help_text = {'text': 'Текст комментария'}
+        widgets = {'parent': HiddenInput}
+
+    def __init__(self, *args, post=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if post is not None:
+            self.fields['parent'].queryset = post.comments.all()
@@ -0,0 +1,49 @@
+import copy
+import threading
+
+from django.http import Http404
+
+from .cache import get_versions
+from .models import Group
+
+
+class GroupRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = (None, (), {}, {})
+
+    def _load(self):
+        version = get_versions('site', 'groups')
+        if version != self._state[0]:
+            with self._lock:
+                if version != self._state[0]:
+                    groups = Group.objects.db_manager('default')
+                    groups = tuple(groups.order_by('title', 'pk'))
+                    self._state = (
+                        version,
+                        groups,
+                        {group.pk: group for group in groups},
+                        {group.slug: group for group in groups},
+                    )
+        return self._state
+
+    def all(self):
+        return self._load()[1]
+
+    def get(self, pk):
+        group = self._load()[2].get(pk)
+        return group and copy.copy(group)
+
+    def by_slug(self, slug):
+        group = self._load()[3].get(slug)
+        return group and copy.copy(group)
+
+
+registry = GroupRegistry()
+
+
+def get_group_or_404(slug):
+    group = registry.by_slug(slug)
+    if group is None:
+        raise Http404('Группа не найдена')
+    return group
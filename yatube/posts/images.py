@@ -0,0 +1,37 @@
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageOps
+
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 90, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 90},
+}
+
+
+def process_upload(upload):
+    upload.seek(0)
+    image = Image.open(upload)
+    image_format = image.format
+    if getattr(image, 'is_animated', False) or image_format not in (
+            'JPEG', 'PNG', 'WEBP'):
+        upload.seek(0)
+        return upload
+    icc_profile = image.info.get('icc_profile')
+    image = ImageOps.exif_transpose(image)
+    limit = settings.POST_IMAGE_MAX_SIZE
+    image.thumbnail((limit, limit), Image.LANCZOS)
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    options = dict(SAVE_OPTIONS[image_format])
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    image.save(buffer, format=image_format, **options)
+    return SimpleUploadedFile(
+        upload.name,
+        buffer.getvalue(),
+        content_type=Image.MIME[image_format],
+    )
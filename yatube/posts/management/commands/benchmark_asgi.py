@@ -0,0 +1,105 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+MODES = ('wsgi', 'asgi')
+DUMMY_CACHE = 'django.core.cache.backends.dummy.DummyCache'
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает ленты под WSGI и асинхронные ленты под ASGI'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=MODES)
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--cold', action='store_true',
+                            help='Отключить кэш страниц и карточек')
+
+    def sample_urls(self, count):
+        urls = [reverse('posts:index')]
+        urls += [reverse('posts:group_list', args=[slug]) for slug in
+                 Group.objects.values_list('slug', flat=True)[:count]]
+        urls += [reverse('posts:profile', args=[username]) for username in
+                 User.objects.filter(posts__isnull=False).distinct()
+                 .values_list('username', flat=True)[:count]]
+        urls += [reverse('posts:post_detail', args=[pk]) for pk in
+                 Post.objects.values_list('pk', flat=True)[:count]]
+        if len(urls) == 1:
+            raise CommandError('Нет постов для проверки')
+        return [urls[index % len(urls)] for index in range(count)]
+
+    def summary(self, timings, elapsed):
+        timings.sort()
+        return {
+            'requests': len(timings),
+            'rps': round(len(timings) / elapsed, 1),
+            'p50_ms': round(timings[len(timings) // 2], 3),
+            'p95_ms': round(timings[int(len(timings) * 0.95)], 3),
+            'max_ms': round(timings[-1], 3),
+        }
+
+    def run_wsgi(self, urls, concurrency):
+        def fetch(url):
+            started = time.perf_counter()
+            Client().get(url)
+            return (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            timings = list(pool.map(fetch, urls))
+        return self.summary(timings, time.perf_counter() - started)
+
+    def run_asgi(self, urls, concurrency):
+        async def fetch(client, limit, url):
+            async with limit:
+                started = time.perf_counter()
+                await client.get(url)
+                return (time.perf_counter() - started) * 1000
+
+        async def fetch_all():
+            client = AsyncClient()
+            limit = asyncio.Semaphore(concurrency)
+            return await asyncio.gather(
+                *(fetch(client, limit, url) for url in urls))
+
+        started = time.perf_counter()
+        timings = asyncio.run(fetch_all())
+        return self.summary(list(timings), time.perf_counter() - started)
+
+    def run_mode(self, mode, options):
+        env = dict(os.environ, YATUBE_ASYNC_VIEWS=str(int(mode == 'asgi')))
+        if options['cold']:
+            env.update(YATUBE_CACHE_BACKEND=DUMMY_CACHE,
+                       YATUBE_CACHE_L1_ENTRIES='0')
+        output = subprocess.run(
+            [sys.executable, sys.argv[0], 'benchmark_asgi', '--mode', mode,
+             '--requests', str(options['requests']),
+             '--concurrency', str(options['concurrency'])],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        return json.loads(output)[mode]
+
+    def handle(self, *args, **options):
+        mode = options['mode']
+        if mode is None:
+            report = {
+                'concurrency': options['concurrency'],
+                'cold': options['cold'],
+                **{mode: self.run_mode(mode, options) for mode in MODES},
+            }
+        else:
+            urls = self.sample_urls(options['requests'])
+            runner = self.run_asgi if mode == 'asgi' else self.run_wsgi
+            report = {mode: runner(urls, options['concurrency'])}
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,105 @@
+import json
+import random
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.db.bulk import next_pk
+from posts.models import Comment, Post, comment_path
+from posts.utils import COMMENT_ORDERINGS, COMMENTS_PER_PAGE, CursorPaginator
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает загрузку ветки комментариев по пути '
+            'с рекурсивной загрузкой')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument('--threads', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def build_tree(self, post, author, size, threads, rng):
+        pk = next_pk(Comment)
+        comments = []
+        roots = []
+        for _ in range(threads):
+            root = Comment(pk=pk, post=post, author=author,
+                           text=f'Ветка {pk}', thread_id=pk,
+                           path=comment_path(pk), depth=0)
+            roots.append(root)
+            comments.append(root)
+            pk += 1
+        nodes = list(roots)
+        while len(comments) < size + threads:
+            parent = rng.choice(nodes)
+            reply = Comment(pk=pk, post=post, author=author,
+                            text=f'Ответ {pk}', parent_id=parent.pk,
+                            thread_id=parent.thread_id,
+                            path=comment_path(pk, parent.path),
+                            depth=parent.depth + 1)
+            comments.append(reply)
+            if reply.depth < settings.COMMENT_MAX_DEPTH:
+                nodes.append(reply)
+            pk += 1
+        Comment.objects.bulk_create(comments, batch_size=500)
+        return max(roots, key=lambda root: sum(
+            comment.thread_id == root.pk for comment in comments))
+
+    def load_path(self, root):
+        return len(Comment.objects.thread(root.pk).select_related('author'))
+
+    def load_recursive(self, root):
+        def walk(comment):
+            replies = comment.replies.select_related('author').order_by('pk')
+            return 1 + sum(walk(reply) for reply in replies)
+        return walk(root)
+
+    def load_page(self, post):
+        roots = Comment.objects.filter(
+            post=post, depth=0).select_related('author')
+        page = CursorPaginator(
+            roots, COMMENTS_PER_PAGE, COMMENT_ORDERINGS['oldest']).page()
+        replies = Comment.objects.reply_previews(
+            [root.pk for root in page], settings.COMMENT_REPLIES_PREVIEW)
+        return len(page) + len(replies)
+
+    def measure(self, load, argument, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            loaded = load(argument)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return {
+            'comments': loaded,
+            'mean_ms': round(sum(timings) / len(timings), 3),
+            'p50_ms': round(timings[len(timings) // 2], 3),
+            'max_ms': round(timings[-1], 3),
+        }
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        repeat = options['repeat']
+        with transaction.atomic():
+            author, _ = User.objects.get_or_create(username='benchmark')
+            post = Post.objects.create(author=author, text='Бенчмарк')
+            root = self.build_tree(post, author, options['comments'],
+                                   options['threads'], rng)
+            report = {
+                'comments': options['comments'],
+                'threads': options['threads'],
+                'max_depth': settings.COMMENT_MAX_DEPTH,
+                'thread_path': self.measure(self.load_path, root, repeat),
+                'thread_recursive': self.measure(
+                    self.load_recursive, root, repeat),
+                'page_with_previews': self.measure(
+                    self.load_page, post, repeat),
+            }
+            transaction.set_rollback(True)
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,53 @@
+import json
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.models import Post
+from posts.search import WORD, get_backend
+
+BASELINE = 'posts.search.SimpleSearchBackend'
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает скорость поиска с поиском через icontains'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def sample_queries(self, count, seed):
+        texts = Post.objects.order_by('?').values_list(
+            'text', flat=True)[:count]
+        words = [word for text in texts for word in WORD.findall(text)
+                 if len(word) > 3]
+        if not words:
+            raise CommandError('Нет постов для построения запросов')
+        rng = random.Random(seed)
+        return [rng.choice(words) for _ in range(count)]
+
+    def measure(self, backend, queries):
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            backend.search(query, settings.SEARCH_RESULTS_LIMIT)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return {
+            'mean_ms': round(sum(timings) / len(timings), 3),
+            'p50_ms': round(timings[len(timings) // 2], 3),
+            'max_ms': round(timings[-1], 3),
+        }
+
+    def handle(self, *args, **options):
+        queries = self.sample_queries(options['queries'], options['seed'])
+        report = {
+            'queries': len(queries),
+            'posts': Post.objects.count(),
+            BASELINE: self.measure(get_backend(BASELINE), queries),
+            settings.POSTS_SEARCH_BACKEND: self.measure(
+                get_backend(), queries),
+        }
+        self.stdout.write(json.dumps(report, indent=2))
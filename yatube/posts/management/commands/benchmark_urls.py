@@ -0,0 +1,255 @@
+import json
+import platform
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle, islice
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import (ThreadedWSGIServer,
+                                          WSGIRequestHandler,
+                                          get_internal_wsgi_application)
+from django.http import HttpRequest
+from django.middleware.csrf import get_token
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.metrics import percentile, registry
+from posts.models import Comment, Follow, Group, Post, User
+
+SAMPLES = 20
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class ClientTransport:
+    def __init__(self, users):
+        self.users = users
+        self.local = threading.local()
+
+    def client(self, user):
+        clients = getattr(self.local, 'clients', None)
+        if clients is None:
+            clients = self.local.clients = {}
+        if user not in clients:
+            clients[user] = Client(raise_request_exception=False)
+            if user is not None:
+                clients[user].force_login(self.users[user])
+        return clients[user]
+
+    def request(self, user, method, path, data):
+        return getattr(self.client(user), method)(path, data).status_code
+
+    def close(self):
+        pass
+
+
+class ServerTransport:
+    def __init__(self, users):
+        self.cookies = {None: ''}
+        for name, user in users.items():
+            client = Client()
+            client.force_login(user)
+            session = client.cookies[settings.SESSION_COOKIE_NAME].value
+            self.cookies[name] = f'{settings.SESSION_COOKIE_NAME}={session}'
+        request = HttpRequest()
+        self.csrf_token = get_token(request)
+        self.csrf_cookie = (
+            f'{settings.CSRF_COOKIE_NAME}={request.META["CSRF_COOKIE"]}')
+        self.server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler)
+        self.server.set_app(get_internal_wsgi_application())
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        host, port = self.server.server_address
+        self.base = f'http://{host}:{port}'
+
+    def request(self, user, method, path, data):
+        body = None
+        headers = {'Cookie': '; '.join(
+            filter(None, (self.cookies[user], self.csrf_cookie)))}
+        if method == 'post':
+            body = urlencode(data or {}).encode()
+            headers['X-CSRFToken'] = self.csrf_token
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        elif data:
+            path = f'{path}?{urlencode(data)}'
+        request = Request(self.base + path, body, headers,
+                          method=method.upper())
+        try:
+            with urlopen(request) as response:
+                response.read()
+                return response.status
+        except HTTPError as error:
+            return error.code
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+
+class Command(BaseCommand):
+    help = ('Нагружает все адреса приложения posts и выводит пропускную '
+            'способность, задержки и число запросов к базе в JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100,
+                            help='Запросов на каждый адрес')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--server', action='store_true',
+                            help='Гонять запросы через локальный WSGI-сервер')
+        parser.add_argument('--writes', action='store_true',
+                            help='Включить комментарии и подписки (пишут '
+                                 'в базу)')
+        parser.add_argument('--cold', action='store_true',
+                            help='Очищать кэш перед каждым адресом')
+        parser.add_argument('--output', help='Файл для отчёта')
+
+    def users(self):
+        author = User.objects.order_by('-profile__posts_count').first()
+        reader = User.objects.order_by('-profile__following_count').first()
+        if author is None or not Post.objects.exists():
+            raise CommandError(
+                'Нет постов: сначала выполните generate_data')
+        return {'author': author, 'reader': reader}
+
+    def targets(self, users, writes):
+        author = users['author']
+        posts = list(Post.objects.order_by('-comments_count').values_list(
+            'pk', flat=True)[:SAMPLES])
+        groups = list(Group.objects.values_list('slug', flat=True)[:SAMPLES])
+        authors = list(User.objects.order_by('-profile__posts_count')
+                       .values_list('username', flat=True)[:SAMPLES])
+        threads = list(Comment.objects.filter(
+            post_id__in=posts, depth=0).values_list(
+            'post_id', 'pk')[:SAMPLES])
+        words = [word for text in Post.objects.values_list(
+            'text', flat=True)[:SAMPLES] for word in text.split()[:1]]
+        own_post = author.posts.values_list('pk', flat=True).first()
+        each = {
+            'post': [(pk,) for pk in posts],
+            'group': [(slug,) for slug in groups],
+            'author': [(username,) for username in authors],
+        }
+        targets = [
+            ('index', 'get', None, [()], None),
+            ('group_index', 'get', None, [()], None),
+            ('group_list', 'get', None, each['group'], None),
+            ('profile', 'get', None, each['author'], None),
+            ('search', 'get', 'reader', [()],
+             [{'q': word} for word in words]),
+            ('post_detail', 'get', 'reader', each['post'], None),
+            ('post_comments', 'get', None, each['post'], None),
+            ('comment_thread', 'get', None, threads, None),
+            ('follow_index', 'get', 'reader', [()], None),
+            ('post_create', 'get', 'author', [()], None),
+            ('post_edit', 'get', 'author', [(own_post,)], None),
+            ('api_index', 'get', None, [()], None),
+            ('api_group_list', 'get', None, each['group'], None),
+            ('api_profile', 'get', None, each['author'], None),
+            ('api_follow_index', 'get', 'reader', [()], None),
+            ('api_post_detail', 'get', None, each['post'], None),
+            ('api_comments', 'get', None, each['post'], None),
+        ]
+        if writes:
+            followed = Follow.objects.filter(
+                user=users['reader']).values_list(
+                'author__username', flat=True)[:SAMPLES]
+            targets += [
+                ('add_comment', 'post', 'reader', each['post'],
+                 [{'text': 'Комментарий из нагрузочного теста'}]),
+                ('profile_unfollow', 'post', 'reader',
+                 [(username,) for username in followed], None),
+                ('profile_follow', 'post', 'reader',
+                 [(username,) for username in followed], None),
+            ]
+        return [target for target in targets if target[3]
+                and None not in target[3][0]]
+
+    def run_target(self, transport, target, options):
+        name, method, user, args, data = target
+        count = options['requests']
+        calls = list(zip(
+            islice(cycle(args), count),
+            islice(cycle(data or [None]), count),
+        ))
+        if options['cold']:
+            cache.clear()
+        registry.reset()
+
+        def fetch(call):
+            path = reverse(f'posts:{name}', args=call[0])
+            started = time.perf_counter()
+            status = transport.request(user, method, path, call[1])
+            return (time.perf_counter() - started) * 1000, status
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(fetch, calls))
+        elapsed = time.perf_counter() - started
+        timings = sorted(timing for timing, _ in results)
+        stats = registry.snapshot().get(f'posts:{name}', {})
+        queries = stats.get('db_queries', {})
+        return {
+            'method': method.upper(),
+            'requests': len(results),
+            'errors': sum(status >= 400 for _, status in results),
+            'rps': round(len(results) / elapsed, 1),
+            'p50_ms': round(percentile(timings, 0.5), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+            'queries_p50': queries.get('p50'),
+            'queries_p99': queries.get('p99'),
+        }
+
+    def revision(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR, capture_output=True, text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def handle(self, *args, **options):
+        users = self.users()
+        targets = self.targets(users, options['writes'])
+        transport_class = ServerTransport if options['server'] else (
+            ClientTransport)
+        report = {
+            'revision': self.revision(),
+            'python': platform.python_version(),
+            'transport': 'server' if options['server'] else 'client',
+            'concurrency': options['concurrency'],
+            'cold': options['cold'],
+            'dataset': {
+                'users': User.objects.count(),
+                'posts': Post.objects.count(),
+                'comments': Comment.objects.count(),
+                'follows': Follow.objects.count(),
+            },
+            'urls': {},
+        }
+        with override_settings(METRICS_SAMPLE_RATE=1):
+            transport = transport_class(users)
+            try:
+                for target in targets:
+                    report['urls'][target[0]] = self.run_target(
+                        transport, target, options)
+            finally:
+                transport.close()
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+        self.stdout.write(output)
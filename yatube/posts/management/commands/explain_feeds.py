@@ -0,0 +1,79 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from posts.models import Comment, Post, User
+from posts.timeline import entries
+from posts.utils import (COMMENT_ORDERINGS, FEED_ORDERING, POSTS_PER_PAGE,
+                         THREAD_ORDERING, CursorPaginator)
+
+SCAN = re.compile(r'\bSCAN (TABLE )?(?P<table>\w+)(?P<index> USING)?')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+def feed_queries():
+    cursor = [timezone.now(), 1]
+    feeds = {
+        'index': (Post.objects.feed(), FEED_ORDERING),
+        'group': (Post.objects.feed().filter(group_id=1), FEED_ORDERING),
+        'profile': (Post.objects.feed().filter(author_id=1), FEED_ORDERING),
+        'follow': (entries(User(pk=1)), FEED_ORDERING),
+        'comments': (
+            Comment.objects.filter(post_id=1, depth=0).select_related(
+                'author'),
+            COMMENT_ORDERINGS['oldest'],
+        ),
+    }
+    for name, (queryset, ordering) in feeds.items():
+        column = ordering[0].lstrip('-')
+        paginator = CursorPaginator(queryset, POSTS_PER_PAGE, ordering)
+        yield f'{name}: первая страница', paginator.window(), None
+        yield f'{name}: после курсора', paginator.window(cursor), column
+        yield (f'{name}: до курсора',
+               paginator.window(cursor, forward=False), column)
+    thread = CursorPaginator(
+        Comment.objects.thread(1).filter(depth__gt=0).select_related(
+            'author'),
+        POSTS_PER_PAGE, THREAD_ORDERING)
+    yield 'thread: первая страница', thread.window(), None
+    yield 'thread: после курсора', thread.window(['0000000001']), 'path'
+
+
+def plan_problems(plan, cursor_column=None):
+    problems = []
+    for line in plan.splitlines():
+        match = SCAN.search(line)
+        if match and not match.group('index'):
+            problems.append(f'полный просмотр {match.group("table")}')
+        elif match and cursor_column:
+            problems.append(
+                f'просмотр индекса {match.group("table")} без диапазона')
+        if TEMP_SORT in line:
+            problems.append('сортировка во временном B-дереве')
+    if cursor_column and not re.search(
+            rf'\bSEARCH \w+ USING (COVERING )?INDEX \w+ '
+            rf'\([^)]*\b{cursor_column}[<>]\?', plan):
+        problems.append(f'курсор не ограничивает {cursor_column} в индексе')
+    return problems
+
+
+class Command(BaseCommand):
+    help = 'Проверяет планы запросов лент на использование индексов'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Проверка планов поддерживает только SQLite')
+        failed = []
+        for name, queryset, cursor_column in feed_queries():
+            plan = queryset.explain()
+            problems = plan_problems(plan, cursor_column)
+            status = 'FAIL' if problems else 'OK'
+            self.stdout.write(f'{status} {name}')
+            if options['verbosity'] > 1 or problems:
+                self.stdout.write(plan)
+            if problems:
+                failed.append(f'{name} ({", ".join(problems)})')
+        if failed:
+            raise CommandError('Запросы без индекса: ' + '; '.join(failed))
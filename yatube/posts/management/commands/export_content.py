@@ -0,0 +1,25 @@
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import BATCH_SIZE, ENCODER, export_records, open_stream
+
+
+class Command(BaseCommand):
+    help = ('Выгружает пользователей, группы, посты, комментарии и подписки '
+            'в NDJSON (в gzip, если файл оканчивается на .gz)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--passwords', action='store_true',
+                            help='Выгрузить хэши паролей')
+
+    def handle(self, *args, **options):
+        count = 0
+        with open_stream(options['path'], 'w') as stream:
+            for record in export_records(options['batch_size'],
+                                         options['passwords']):
+                stream.write(ENCODER.encode(record))
+                stream.write('\n')
+                count += 1
+        self.stdout.write(f'Выгружено записей: {count}')
@@ -0,0 +1,183 @@
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from core.db.bulk import manual_timestamps, next_pk
+from posts.cache import bump_versions
+from posts.models import Comment, Follow, Group, Post, User, comment_path
+
+WORDS = (
+    'город река утро вечер дорога книга письмо окно дом сад лес поле '
+    'море небо солнце дождь снег ветер друг семья работа отпуск музыка '
+    'фильм фото кофе чай завтрак прогулка поезд самолёт встреча идея '
+    'проект код тест релиз ошибка решение вопрос ответ история новости '
+    'сегодня вчера завтра снова наконец очень тихо громко быстро медленно '
+    'красивый новый старый большой маленький тёплый холодный долгий'
+).split()
+BATCH_SIZE = 1000
+FOLLOW_ALPHA = 2
+
+
+def zipf_weights(size, skew):
+    return list(accumulate(1 / (rank + 1) ** skew for rank in range(size)))
+
+
+class Command(BaseCommand):
+    help = ('Наполняет базу пользователями, группами, постами, '
+            'подписками и комментариями для нагрузочных тестов')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--follows', type=float, default=10,
+                            help='Среднее число подписок на пользователя')
+        parser.add_argument('--skew', type=float, default=1.1,
+                            help='Показатель распределения Ципфа')
+        parser.add_argument('--reply-share', type=float, default=0.3)
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def text(self, rng, low, high):
+        words = rng.choices(WORDS, k=rng.randint(low, high))
+        return ' '.join(words).capitalize() + '.'
+
+    def moment(self, rng, since, now):
+        return since + (now - since) * rng.random()
+
+    def create_users(self, count, rng):
+        pk = next_pk(User)
+        password = make_password(None)
+        users = [
+            User(pk=pk + index, username=f'user{pk + index}',
+                 password=password)
+            for index in range(count)
+        ]
+        User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+        ids = [user.pk for user in users]
+        rng.shuffle(ids)
+        return ids
+
+    def create_groups(self, count):
+        pk = next_pk(Group)
+        groups = [
+            Group(pk=pk + index, title=f'Группа {pk + index}',
+                  slug=f'group-{pk + index}',
+                  description=f'Описание группы {pk + index}')
+            for index in range(count)
+        ]
+        Group.objects.bulk_create(groups, batch_size=BATCH_SIZE)
+        return [group.pk for group in groups]
+
+    def create_posts(self, count, authors, groups, skew, rng, since, now):
+        pk = next_pk(Post)
+        author_weights = zipf_weights(len(authors), skew)
+        group_weights = zipf_weights(len(groups), skew) if groups else None
+        posts = []
+        for index in range(count):
+            group_id = None
+            if groups and rng.random() < 0.7:
+                group_id = rng.choices(groups, cum_weights=group_weights)[0]
+            posts.append(Post(
+                pk=pk + index,
+                text=self.text(rng, 5, 60),
+                author_id=rng.choices(
+                    authors, cum_weights=author_weights)[0],
+                group_id=group_id,
+                pub_date=self.moment(rng, since, now),
+            ))
+        with manual_timestamps(Post, 'pub_date'):
+            Post.objects.bulk_create(posts, batch_size=BATCH_SIZE)
+        posts.sort(key=lambda post: post.pub_date, reverse=True)
+        return posts
+
+    def create_follows(self, users, mean, skew, rng):
+        if mean <= 0 or len(users) < 2:
+            return 0
+        weights = zipf_weights(len(users), skew)
+        scale = mean * (FOLLOW_ALPHA - 1) / FOLLOW_ALPHA
+        follows = []
+        for user_id in users:
+            wanted = min(round(scale * rng.paretovariate(FOLLOW_ALPHA)),
+                         len(users) - 1)
+            authors = set()
+            for _ in range(wanted * 3):
+                if len(authors) >= wanted:
+                    break
+                author_id = rng.choices(users, cum_weights=weights)[0]
+                if author_id != user_id:
+                    authors.add(author_id)
+            follows += [Follow(user_id=user_id, author_id=author_id)
+                        for author_id in authors]
+        Follow.objects.bulk_create(
+            follows, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        return len(follows)
+
+    def create_comments(self, count, posts, users, options, rng, now):
+        if not posts:
+            return 0
+        pk = next_pk(Comment)
+        post_weights = zipf_weights(len(posts), options['skew'])
+        threads = {}
+        comments = []
+        for index in range(count):
+            post = rng.choices(posts, cum_weights=post_weights)[0]
+            existing = threads.setdefault(post.pk, [])
+            parent = None
+            if existing and rng.random() < options['reply_share']:
+                parent = rng.choice(existing)
+                if parent.depth >= settings.COMMENT_MAX_DEPTH:
+                    parent = None
+            comment = Comment(
+                pk=pk + index,
+                post_id=post.pk,
+                author_id=rng.choice(users),
+                text=self.text(rng, 3, 30),
+            )
+            if parent is None:
+                comment.thread_id = comment.pk
+                comment.path = comment_path(comment.pk)
+                comment.created = self.moment(rng, post.pub_date, now)
+            else:
+                comment.parent_id = parent.pk
+                comment.thread_id = parent.thread_id
+                comment.depth = parent.depth + 1
+                comment.path = comment_path(comment.pk, parent.path)
+                comment.created = self.moment(rng, parent.created, now)
+            existing.append(comment)
+            comments.append(comment)
+        with manual_timestamps(Comment, 'created'):
+            Comment.objects.bulk_create(comments, batch_size=BATCH_SIZE)
+        return len(comments)
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь')
+        rng = random.Random(options['seed'])
+        now = timezone.now()
+        since = now - timedelta(days=options['days'])
+        with transaction.atomic():
+            users = self.create_users(options['users'], rng)
+            groups = self.create_groups(options['groups'])
+            posts = self.create_posts(options['posts'], users, groups,
+                                      options['skew'], rng, since, now)
+            follows = self.create_follows(users, options['follows'],
+                                          options['skew'], rng)
+            comments = self.create_comments(options['comments'], posts,
+                                            users, options, rng, now)
+            self.stdout.write(
+                f'Создано пользователей: {len(users)}, групп: {len(groups)}, '
+                f'постов: {len(posts)}, подписок: {follows}, '
+                f'комментариев: {comments}')
+            call_command('recount', stdout=self.stdout)
+            call_command('rebuild_search_index', stdout=self.stdout)
+            call_command('rebuild_timelines', stdout=self.stdout)
+        bump_versions('site')
@@ -0,0 +1,53 @@
+import json
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.db.bulk import manual_timestamps
+from posts.cache import bump_versions
+from posts.models import Comment, Post
+from posts.transfer import BATCH_SIZE, BatchError, Importer, open_stream
+
+
+class Command(BaseCommand):
+    help = ('Загружает NDJSON из export_content пачками через bulk_create '
+            'и пересобирает счётчики, поиск, ленты и миниатюры')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--media-dir',
+                            help='Каталог с картинками из выгрузки')
+        parser.add_argument('--skip-rebuild', action='store_true',
+                            help='Не пересобирать счётчики, поиск, ленты '
+                                 'и миниатюры')
+
+    def handle(self, *args, **options):
+        number = 0
+        with transaction.atomic(), \
+                manual_timestamps(Post, 'pub_date'), \
+                manual_timestamps(Comment, 'created'), \
+                open_stream(options['path'], 'r') as stream:
+            importer = Importer(options['batch_size'], options['media_dir'])
+            try:
+                for number, line in enumerate(stream, 1):
+                    if line.strip():
+                        importer.add(json.loads(line), number)
+                counts = importer.finish()
+            except BatchError as error:
+                if error.first == error.last:
+                    raise CommandError(f'Строка {error.first}: {error}')
+                raise CommandError(
+                    f'Строки {error.first}–{error.last}: {error}')
+            except (ValueError, KeyError, TypeError) as error:
+                raise CommandError(f'Строка {number}: {error}')
+            if not options['skip_rebuild']:
+                call_command('recount', stdout=self.stdout)
+                call_command('rebuild_search_index', stdout=self.stdout)
+                call_command('rebuild_timelines', stdout=self.stdout)
+        bump_versions('site')
+        if not options['skip_rebuild']:
+            call_command('warm_thumbnails', stdout=self.stdout)
+        self.stdout.write('Загружено: ' + ', '.join(
+            f'{kind}: {count}' for kind, count in counts.items()))
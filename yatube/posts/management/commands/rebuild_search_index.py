@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает поисковый индекс постов и комментариев'
+
+    def handle(self, *args, **options):
+        total = get_backend().rebuild()
+        self.stdout.write(f'Проиндексировано записей: {total}')
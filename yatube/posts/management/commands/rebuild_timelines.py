@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Follow, TimelineEntry
+from posts.timeline import backfill
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает ленты подписок из таблицы подписок'
+
+    def handle(self, *args, **options):
+        TimelineEntry.objects.all().delete()
+        count = 0
+        follows = Follow.objects.values_list('user_id', 'author_id')
+        for user_id, author_id in follows.iterator():
+            backfill(user_id, author_id)
+            count += 1
+        self.stdout.write(f'Пересобрано подписок: {count}')
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount_groups, recount_posts, recount_profiles
+from posts.models import Comment, Follow, Group, Post, User
+from users.models import Profile
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики постов, комментариев и подписок '
+            'у постов, групп и профилей')
+
+    def handle(self, *args, **options):
+        posts = recount_posts(Post, Comment)
+        groups = recount_groups(Group, Post)
+        profiles = recount_profiles(Profile, User, Post, Follow)
+        self.stdout.write(f'Пересчитано постов: {posts}, групп: {groups}, '
+                          f'профилей: {profiles}')
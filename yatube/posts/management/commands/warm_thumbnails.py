@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import executor, generate_in_worker
+
+
+class Command(BaseCommand):
+    help = 'Заранее готовит миниатюры для всех картинок постов'
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').values_list('pk', flat=True)
+        done = sum(executor().map(generate_in_worker, posts.iterator()))
+        self.stdout.write(f'Подготовлены миниатюры для постов: {done}')
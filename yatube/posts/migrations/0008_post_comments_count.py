@@ -0,0 +1,26 @@
+# Generated by Django 2.2.19 on 2026-10-17 04:18
+
+from django.db import migrations, models
+
+FILL_COMMENTS_COUNT = '''
+UPDATE posts_post SET comments_count = (
+    SELECT COUNT(*) FROM posts_comment
+    WHERE posts_comment.post_id = posts_post.id
+)
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Комментариев'),
+        ),
+        migrations.RunSQL(FILL_COMMENTS_COUNT, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+CREATE_TABLE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_search USING fts5("
+    "text, post_id UNINDEXED, tokenize='unicode61 remove_diacritics 2')"
+)
+FILL_TABLE = (
+    'INSERT INTO posts_search(rowid, text, post_id) '
+    'SELECT id * 2, text, id FROM posts_post '
+    'UNION ALL '
+    'SELECT id * 2 + 1, text, post_id FROM posts_comment'
+)
+
+
+def create_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_TABLE)
+    schema_editor.execute(FILL_TABLE)
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS posts_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_post_comments_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 2.2.19 on 2026-10-17 04:24
+
+import core.storage
+from django.db import migrations, models
+
+
+def fill_media_blobs(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    MediaBlob = apps.get_model('core', 'MediaBlob')
+    images = (Post.objects.exclude(image='').values('image')
+              .annotate(references=models.Count('pk')).order_by())
+    MediaBlob.objects.bulk_create(
+        MediaBlob(name=row['image'], references=row['references'])
+        for row in images
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('posts', '0009_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, storage=core.storage.HashedStorage(), upload_to='posts/', verbose_name='Картинка'),
+        ),
+        migrations.RunPython(fill_media_blobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+FILL_POSTS_COUNT = '''
+UPDATE posts_group SET posts_count = (
+    SELECT COUNT(*) FROM posts_post
+    WHERE posts_post.group_id = posts_group.id
+)
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_comment_threads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Постов'),
+        ),
+        migrations.RunSQL(FILL_POSTS_COUNT, migrations.RunSQL.noop),
+    ]
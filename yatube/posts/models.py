@@ -1,14 +1,38 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, router, transaction
+from django.db.models.functions import Cast, Concat, LPad
 from django.contrib.auth import get_user_model
 
+from core.storage import HashedStorage
+
 
 User = get_user_model()
 
+FEED_FIELDS = (
+    'id',
+    'text',
+    'pub_date',
+    'image',
+    'author',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group',
+    'group__title',
+    'group__slug',
+    'comments_count',
+)
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=100, unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(
+        'Постов',
+        default=0,
+        editable=False
+    )
 
     class Meta():
         verbose_name = 'Группы'
@@ -18,6 +42,11 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def feed(self):
+        return self.select_related('author', 'group').only(*FEED_FIELDS)
+
+
 class Post(models.Model):
     text = models.TextField(
         'Текст поста',
@@ -49,11 +78,33 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=HashedStorage(),
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        'Комментариев',
+        default=0,
+        editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_date_idx'
+            ),
+        ]
         verbose_name = 'Посты'
         verbose_name_plural = 'Посты'
 
@@ -61,6 +112,51 @@ class Post(models.Model):
         return self.text[:15]
 
 
+COMMENT_PATH_STEP = 10
+
+
+def comment_path(pk, parent_path=''):
+    segment = str(pk).zfill(COMMENT_PATH_STEP)
+    return f'{parent_path}/{segment}' if parent_path else segment
+
+
+class CommentQuerySet(models.QuerySet):
+    def thread(self, root_id):
+        return self.filter(thread_id=root_id).order_by('path')
+
+    def reply_previews(self, root_ids, limit):
+        if not root_ids:
+            return []
+        table = self.model._meta.db_table
+        placeholders = ', '.join(['%s'] * len(root_ids))
+        return list(self.raw(
+            f'SELECT * FROM ('
+            f'SELECT *, ROW_NUMBER() OVER ('
+            f'PARTITION BY thread_id ORDER BY path) AS position, '
+            f'COUNT(*) OVER (PARTITION BY thread_id) AS thread_size '
+            f'FROM {table} WHERE thread_id IN ({placeholders}) AND depth > 0'
+            f') WHERE position <= %s ORDER BY thread_id, path',
+            [*root_ids, limit],
+        ))
+
+    def fill_paths(self):
+        segment = LPad(Cast('id', models.CharField()), COMMENT_PATH_STEP,
+                       models.Value('0'))
+        filled = self.filter(path='', parent__isnull=True).update(
+            thread=models.F('id'), path=segment, depth=0)
+        parents = self.model.objects.filter(pk=models.OuterRef('parent_id'))
+        while True:
+            updated = self.filter(path='', parent__path__gt='').update(
+                path=Concat(models.Subquery(parents.values('path')),
+                            models.Value('/'), segment),
+                thread=models.Subquery(parents.values('thread_id')),
+                depth=models.Subquery(parents.values('depth')) + 1,
+            )
+            if not updated:
+                return filled
+            filled += updated
+
+
 class Comment(models.Model):
     text = models.TextField('Текст', help_text='Текст нового комментария')
     author = models.ForeignKey(
@@ -71,15 +167,75 @@ class Comment(models.Model):
     post = models.ForeignKey(Post, related_name='comments',
                              on_delete=models.CASCADE)
     created = models.DateTimeField(auto_now_add=True)
+    parent = models.ForeignKey(
+        'self',
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='replies',
+        verbose_name='Ответ на',
+    )
+    thread = models.ForeignKey(
+        'self',
+        null=True,
+        editable=False,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Ветка',
+    )
+    path = models.CharField(max_length=255, default='', editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         ordering = ['created']
+        indexes = [
+            models.Index(
+                fields=['post', 'created', 'id'],
+                name='comment_post_created_idx'
+            ),
+            models.Index(
+                fields=['post', 'depth', 'created', 'id'],
+                name='comment_post_roots_idx'
+            ),
+            models.Index(
+                fields=['thread', 'path'],
+                name='comment_thread_path_idx'
+            ),
+        ]
         verbose_name = 'Комментарии'
         verbose_name_plural = 'Комментарии'
 
     def __str__(self):
         return self.text
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.parent_id:
+            parent = self.parent
+            if parent.depth >= settings.COMMENT_MAX_DEPTH:
+                self.parent = parent = parent.parent
+            self.thread_id = parent.thread_id
+            self.depth = parent.depth + 1
+        using = kwargs.get('using') or router.db_for_write(
+            Comment, instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+    def _save_table(self, raw=False, cls=None, force_insert=False,
+                    force_update=False, using=None, update_fields=None):
+        updated = super()._save_table(raw, cls, force_insert, force_update,
+                                      using, update_fields)
+        if not updated and not self.path:
+            if self.parent_id:
+                self.path = comment_path(self.pk, self.parent.path)
+            else:
+                self.path = comment_path(self.pk)
+                self.thread_id = self.pk
+            Comment.objects.using(using).filter(pk=self.pk).update(
+                path=self.path, thread=self.thread_id)
+        return updated
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -107,3 +263,49 @@ class Follow(models.Model):
 
     def __str__(self):
         return f'Подписчик: {self.user}, Автор : {self.author}'
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ['-pub_date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique timeline entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-id'],
+                name='timeline_user_date_idx'
+            ),
+            models.Index(
+                fields=['user', 'author', '-pub_date'],
+                name='timeline_user_author_idx'
+            ),
+        ]
+        verbose_name = 'Лента подписок'
+        verbose_name_plural = 'Лента подписок'
+
+    def __str__(self):
+        return f'{self.user}: {self.post}'
@@ -0,0 +1,129 @@
+import re
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Comment, Post
+
+SEARCH_TABLE = 'posts_search'
+BATCH_SIZE = 1000
+WORD = re.compile(r'\w+')
+
+
+def post_rowid(pk):
+    return pk * 2
+
+
+def comment_rowid(pk):
+    return pk * 2 + 1
+
+
+class BaseSearchBackend(ABC):
+    @abstractmethod
+    def search(self, query, limit):
+        pass
+
+    def index_post(self, post):
+        pass
+
+    def index_comment(self, comment):
+        pass
+
+    def remove_post(self, pk):
+        pass
+
+    def remove_comment(self, pk):
+        pass
+
+    def rebuild(self):
+        return 0
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    def search(self, query, limit):
+        words = WORD.findall(query)
+        if not words:
+            return []
+        condition = Q()
+        for word in words:
+            condition &= (Q(text__icontains=word)
+                          | Q(comments__text__icontains=word))
+        posts = Post.objects.filter(condition).order_by('-pub_date', '-pk')
+        return list(posts.values_list('pk', flat=True).distinct()[:limit])
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    def match_expression(self, query):
+        terms = [f'"{word}"' for word in WORD.findall(query)]
+        if terms:
+            terms[-1] += '*'
+        return ' '.join(terms)
+
+    def search(self, query, limit):
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT post_id FROM ('
+                f'SELECT post_id, rank FROM {SEARCH_TABLE} '
+                f'WHERE {SEARCH_TABLE} MATCH %s'
+                f') GROUP BY post_id ORDER BY MIN(rank) LIMIT %s',
+                [expression, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def _write(self, rows):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {SEARCH_TABLE}'
+                f'(rowid, text, post_id) VALUES (%s, %s, %s)',
+                rows,
+            )
+
+    def _remove(self, rowid):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [rowid])
+
+    def index_post(self, post):
+        self._write([(post_rowid(post.pk), post.text, post.pk)])
+
+    def index_comment(self, comment):
+        self._write([
+            (comment_rowid(comment.pk), comment.text, comment.post_id)
+        ])
+
+    def remove_post(self, pk):
+        self._remove(post_rowid(pk))
+
+    def remove_comment(self, pk):
+        self._remove(comment_rowid(pk))
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        sources = (
+            (Post.objects.values_list('pk', 'text', 'pk'), post_rowid),
+            (Comment.objects.values_list('pk', 'text', 'post_id'),
+             comment_rowid),
+        )
+        total = 0
+        for queryset, rowid in sources:
+            batch = []
+            for pk, text, post_id in queryset.iterator(chunk_size=BATCH_SIZE):
+                batch.append((rowid(pk), text, post_id))
+                if len(batch) == BATCH_SIZE:
+                    self._write(batch)
+                    total += len(batch)
+                    batch = []
+            self._write(batch)
+            total += len(batch)
+        return total
+
+
+def get_backend(path=None):
+    return import_string(path or settings.POSTS_SEARCH_BACKEND)()
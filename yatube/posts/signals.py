@@ -0,0 +1,180 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from core.models import MediaBlob
+from users.models import Profile
+
+from . import thumbnails, timeline
+from .cache import bump_versions, post_feed_scopes
+from .models import Comment, Follow, Group, Post, User
+from .search import get_backend
+
+
+def shift_counter(queryset, field, delta):
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+@receiver(post_init, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    instance._loaded_group_id = instance.__dict__.get('group_id')
+    image = instance.__dict__.get('image')
+    instance._loaded_image = None if image is None else str(image)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, signal, created=False, **kwargs):
+    deleted = signal is post_delete
+    old_group_id = None if created else instance._loaded_group_id
+    new_group_id = None if deleted else instance.group_id
+    count_group_posts(old_group_id, new_group_id)
+    bump_versions(
+        f'post:{instance.pk}',
+        *post_feed_scopes(instance, old_group_id),
+    )
+    if deleted:
+        release_post_image(instance)
+    else:
+        count_image_references(instance, created)
+    remember_group(sender, instance)
+
+
+def count_group_posts(old_group_id, new_group_id):
+    if old_group_id == new_group_id:
+        return
+    if old_group_id:
+        shift_counter(Group.objects.filter(pk=old_group_id),
+                      'posts_count', -1)
+    if new_group_id:
+        shift_counter(Group.objects.filter(pk=new_group_id),
+                      'posts_count', 1)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created and instance.author_id:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group(sender, instance, created=False, **kwargs):
+    bump_versions(f'group:{instance.pk}', 'groups')
+    if not created:
+        bump_versions('site')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user(sender, instance, created=False, update_fields=None,
+                    **kwargs):
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    bump_versions(f'user:{instance.pk}')
+    if not created:
+        bump_versions('site')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    bump_versions(f'feed:post:{instance.post_id}', 'comments')
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow(sender, instance, **kwargs):
+    bump_versions(
+        f'feed:author:{instance.author_id}',
+        f'feed:author:{instance.user_id}',
+    )
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    timeline.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def count_posts(sender, instance, signal, created=False, **kwargs):
+    if signal is post_save and not created or not instance.author_id:
+        return
+    shift_counter(Profile.objects.filter(user_id=instance.author_id),
+                  'posts_count', 1 if created else -1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def count_comments(sender, instance, signal, created=False, **kwargs):
+    if signal is post_save and not created:
+        return
+    shift_counter(Post.objects.filter(pk=instance.post_id),
+                  'comments_count', 1 if created else -1)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def count_follows(sender, instance, signal, created=False, **kwargs):
+    if signal is post_save and not created:
+        return
+    delta = 1 if created else -1
+    shift_counter(Profile.objects.filter(user_id=instance.author_id),
+                  'followers_count', delta)
+    shift_counter(Profile.objects.filter(user_id=instance.user_id),
+                  'following_count', delta)
+    timeline.followers_changed(instance.author_id, delta)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    get_backend().index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    get_backend().remove_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    get_backend().index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    get_backend().remove_comment(instance.pk)
+
+
+def release_image(name):
+    if name and MediaBlob.objects.release(name):
+        transaction.on_commit(lambda: thumbnails.discard(name))
+
+
+def count_image_references(instance, created):
+    image = instance.__dict__.get('image')
+    if image is None or not created and instance._loaded_image is None:
+        return
+    image = str(image)
+    if not created and image == instance._loaded_image:
+        return
+    if image:
+        MediaBlob.objects.acquire(image)
+    if not created:
+        release_image(instance._loaded_image)
+
+
+def release_post_image(instance):
+    image = instance.__dict__.get('image')
+    if image is not None:
+        release_image(str(image))
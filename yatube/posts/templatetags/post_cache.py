@@ -0,0 +1,12 @@
+from django import template
+
+from ..cache import card_scopes, get_versions
+
+register = template.Library()
+
+
+@register.filter
+def card_version(post, user):
+    versions = get_versions(*card_scopes(post))
+    is_author = post.author_id is not None and post.author_id == user.pk
+    return '.'.join(map(str, versions)) + f'.{int(is_author)}'
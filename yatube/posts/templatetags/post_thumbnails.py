@@ -0,0 +1,34 @@
+from django import template
+from django.conf import settings
+
+from ..thumbnails import MIME_TYPES, ready_variants
+
+register = template.Library()
+
+
+def srcset(variants):
+    return ', '.join(f'{url} {width}w' for url, width in variants)
+
+
+@register.inclusion_tag('posts/includes/picture.html')
+def responsive_image(image):
+    if not image:
+        return {}
+    variants = ready_variants(image)
+    fallback = variants.pop('JPEG', [])
+    sources = [
+        {'type': MIME_TYPES[image_format], 'srcset': srcset(items)}
+        for image_format, items in variants.items()
+    ]
+    card_width = settings.POST_IMAGE_GEOMETRY[0]
+    src = image.url
+    for url, width in fallback:
+        if width == card_width:
+            src = url
+    return {
+        'image': image,
+        'src': src,
+        'srcset': srcset(fallback),
+        'sources': sources,
+        'sizes': f'(max-width: {card_width}px) 100vw, {card_width}px',
+    }
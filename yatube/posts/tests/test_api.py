@@ -0,0 +1,120 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from ..utils import POSTS_PER_PAGE
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {index}', author=cls.user, group=cls.group)
+            for index in range(POSTS_PER_PAGE + 2)
+        )
+        cls.post = Post.objects.create(
+            text='Последний пост', author=cls.user, group=cls.group)
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_feeds_return_compact_json(self):
+        """API отдаёт ленты страницами по курсору."""
+        urls = (
+            reverse('posts:api_index'),
+            reverse('posts:api_group_list', args=[self.group.slug]),
+            reverse('posts:api_profile', args=[self.user.username]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                self.assertNotIn(b'": ', response.content)
+                data = response.json()
+                self.assertEqual(len(data['results']), POSTS_PER_PAGE)
+                self.assertEqual(data['results'][0]['id'], self.post.pk)
+                self.assertEqual(
+                    data['results'][0]['author']['username'], 'auth')
+                self.assertIsNone(data['previous'])
+                data = self.client.get(data['next']).json()
+                self.assertEqual(len(data['results']), 3)
+                self.assertIsNone(data['next'])
+
+    def test_follow_feed(self):
+        """Лента подписок доступна только авторизованным."""
+        url = reverse('posts:api_follow_index')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        data = self.reader_client.get(url).json()
+        self.assertEqual(data['results'][0]['id'], self.post.pk)
+
+    def test_unchanged_feed_is_not_modified(self):
+        """Повторный запрос с ETag получает 304, пока лента не изменилась."""
+        url = reverse('posts:api_group_list', args=[self.group.slug])
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        Post.objects.create(text='Новый', author=self.user, group=self.group)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_comment_revalidates_post_counts(self):
+        """Новый комментарий сбрасывает ETag поста и лент API."""
+        urls = (
+            reverse('posts:api_post_detail', args=[self.post.pk]),
+            reverse('posts:api_index'),
+            reverse('posts:api_group_list', args=[self.group.slug]),
+            reverse('posts:api_profile', args=[self.user.username]),
+        )
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        Comment.objects.create(post=self.post, author=self.reader, text='Ок')
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                data = response.json()
+                post = data['results'][0] if 'results' in data else data
+                self.assertEqual(post['comments'], 1)
+
+    def test_post_detail_and_comments(self):
+        """Пост и комментарии отдаются отдельно и валидируются по ETag."""
+        detail = self.client.get(
+            reverse('posts:api_post_detail', args=[self.post.pk]))
+        self.assertEqual(detail.json()['text'], self.post.text)
+        url = reverse('posts:api_comments', args=[self.post.pk])
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(post=self.post, author=self.reader, text='Ок')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json()['results'][0]['text'], 'Ок')
+        response = self.client.get(
+            reverse('posts:api_post_detail', args=[0]))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_missing_objects_return_json(self):
+        """Отсутствующие объекты отдаются как JSON с кодом 404."""
+        urls = (
+            reverse('posts:api_group_list', args=['missing']),
+            reverse('posts:api_profile', args=['missing']),
+            reverse('posts:api_post_detail', args=[0]),
+            reverse('posts:api_comments', args=[0]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                self.assertEqual(response.json(), {'detail': 'Не найдено.'})
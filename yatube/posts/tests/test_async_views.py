@@ -0,0 +1,77 @@
+from http import HTTPStatus
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import Http404
+from django.test import AsyncRequestFactory, TransactionTestCase
+
+from users.models import Profile
+
+from .. import async_views
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class AsyncViewsTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+        self.author = User.objects.create_user(username='auth')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.post = Post.objects.create(
+            text='Асинхронный пост', author=self.author, group=self.group)
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий')
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def get(self, view, user=None, etag=None, **kwargs):
+        request = self.factory.get('/')
+        request.user = user or AnonymousUser()
+        if etag:
+            request.META['HTTP_IF_NONE_MATCH'] = etag
+        return async_to_sync(view)(request, **kwargs)
+
+    def test_pages_render(self):
+        """Асинхронные страницы отдают те же данные, что и синхронные."""
+        pages = (
+            (async_views.index, {}, 'Асинхронный пост'),
+            (async_views.group_posts, {'slug': 'group'}, 'Асинхронный пост'),
+            (async_views.profile, {'username': 'auth'}, 'Отписаться'),
+            (async_views.post_detail, {'post_id': self.post.pk},
+             'Комментарий'),
+        )
+        for view, kwargs, text in pages:
+            with self.subTest(view=view.__name__):
+                response = self.get(view, user=self.reader, **kwargs)
+                self.assertContains(response, text)
+                self.assertTrue(response.has_header('ETag'))
+
+    def test_not_modified(self):
+        """Совпавший ETag возвращает 304 без рендера."""
+        etag = self.get(async_views.index)['ETag']
+        response = self.get(async_views.index, etag=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_missing_objects(self):
+        """Несуществующие автор и пост дают 404."""
+        with self.assertRaises(Http404):
+            self.get(async_views.profile, username='nobody')
+        with self.assertRaises(Http404):
+            self.get(async_views.post_detail, post_id=0)
+
+    def test_author_without_profile(self):
+        """Автор без профиля получает профиль с посчитанными счётчиками."""
+        Profile.objects.filter(user=self.author).delete()
+        for view, kwargs in ((async_views.profile, {'username': 'auth'}),
+                             (async_views.post_detail,
+                              {'post_id': self.post.pk})):
+            with self.subTest(view=view.__name__):
+                response = self.get(view, **kwargs)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            Profile.objects.filter(user=self.author).values_list(
+                'posts_count', 'followers_count').get(), (1, 1))
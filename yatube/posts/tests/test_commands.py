@@ -0,0 +1,200 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase, TransactionTestCase
+
+from users.models import Profile
+
+from ..management.commands.explain_feeds import plan_problems
+from ..models import Comment, Follow, Group, Post, TimelineEntry
+from ..search import get_backend
+
+User = get_user_model()
+
+
+class ExplainFeedsTests(TestCase):
+    def test_feed_queries_use_indexes(self):
+        """Все запросы лент используют индексы."""
+        out = StringIO()
+        call_command('explain_feeds', stdout=out)
+        self.assertNotIn('FAIL', out.getvalue())
+
+    def test_full_scan_and_temp_sort_detected(self):
+        """Полный просмотр и сортировка во временном дереве — ошибка."""
+        plan = ('2 0 0 SCAN posts_post\n'
+                '9 0 0 USE TEMP B-TREE FOR ORDER BY')
+        self.assertEqual(len(plan_problems(plan)), 2)
+        self.assertEqual(
+            plan_problems('7 0 0 SCAN posts_post USING INDEX post_date_idx'),
+            [])
+
+    def test_cursor_page_needs_index_range(self):
+        """Страница по курсору должна ограничивать диапазон индекса."""
+        scan = '7 0 0 SCAN posts_post USING INDEX post_date_idx'
+        self.assertEqual(len(plan_problems(scan, 'pub_date')), 2)
+        plan = ('11 0 0 SEARCH posts_post USING INDEX post_group_date_idx '
+                '(group_id=?)')
+        self.assertEqual(len(plan_problems(plan, 'pub_date')), 1)
+        plan = ('11 0 0 SEARCH posts_post USING INDEX post_group_date_idx '
+                '(group_id=? AND pub_date<?)')
+        self.assertEqual(plan_problems(plan, 'pub_date'), [])
+
+
+class RecountTests(TestCase):
+    def test_recount_repairs_drift(self):
+        """Команда recount восстанавливает разошедшиеся счётчики."""
+        author = User.objects.create_user(username='author')
+        reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(title='Группа', slug='group')
+        post = Post.objects.create(author=author, text='Пост', group=group)
+        Comment.objects.create(post=post, author=reader, text='Комментарий')
+        Follow.objects.create(user=reader, author=author)
+        Profile.objects.update(posts_count=7, followers_count=7,
+                               following_count=7)
+        Profile.objects.filter(user=reader).delete()
+        Post.objects.update(comments_count=7)
+        Group.objects.update(posts_count=7)
+        call_command('recount', stdout=StringIO())
+        post.refresh_from_db()
+        group.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(group.posts_count, 1)
+        self.assertEqual(
+            list(Profile.objects.order_by('user__username').values_list(
+                'posts_count', 'followers_count', 'following_count')),
+            [(1, 1, 0), (0, 0, 1)])
+
+
+class RebuildSearchIndexTests(TestCase):
+    def test_rebuild_restores_index(self):
+        """Пересборка индекса возвращает потерянные записи."""
+        author = User.objects.create_user(username='author')
+        post = Post.objects.create(author=author, text='Пост про котов')
+        backend = get_backend()
+        backend.remove_post(post.pk)
+        self.assertEqual(backend.search('котов', 10), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(backend.search('котов', 10), [post.pk])
+
+
+class ContentTransferTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'content.ndjson.gz')
+
+    def test_round_trip(self):
+        """Выгрузка загружается обратно с ветками, подписками и лентами."""
+        author = User.objects.create_user(username='author')
+        reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(title='Группа', slug='group')
+        post = Post.objects.create(author=author, group=group,
+                                   text='Пост про котов')
+        root = Comment.objects.create(post=post, author=reader, text='Да')
+        Comment.objects.create(post=post, author=author, parent=root,
+                               text='Нет')
+        Follow.objects.create(user=reader, author=author)
+        call_command('export_content', self.path, stdout=StringIO())
+        Post.objects.all().delete()
+        call_command('import_content', self.path, stdout=StringIO())
+        post = Post.objects.get()
+        self.assertEqual((post.author, post.group), (author, group))
+        self.assertEqual(post.comments_count, 2)
+        reply = Comment.objects.get(text='Нет')
+        self.assertEqual(reply.thread, reply.parent)
+        self.assertEqual(reply.path, f'{reply.parent.path}/{reply.pk:010}')
+        self.assertEqual(User.objects.count(), 2)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=reader, post=post).exists())
+        self.assertEqual(get_backend().search('котов', 10), [post.pk])
+
+    def test_unknown_author_rejected(self):
+        """Пост с неизвестным автором прерывает загрузку целиком."""
+        with open(self.path[:-3], 'w') as stream:
+            stream.write('{"type":"group","slug":"g","title":"Г"}\n')
+            stream.write('{"type":"post","id":1,"author":"ghost",'
+                         '"text":"Пост"}\n')
+        with self.assertRaisesMessage(CommandError, 'Строка 2: '):
+            call_command('import_content', self.path[:-3], stdout=StringIO())
+        self.assertFalse(Group.objects.exists())
+
+    def test_error_reports_batch_lines(self):
+        """Ошибка пачки сообщает диапазон её строк, а не строку сброса."""
+        with open(self.path[:-3], 'w') as stream:
+            stream.write('{"type":"user","username":"auth"}\n')
+            for number in range(1, 4):
+                stream.write(f'{{"type":"post","id":{number},'
+                             f'"author":"ghost","text":"Пост"}}\n')
+            stream.write('{"type":"group","slug":"g","title":"Г"}\n')
+        with self.assertRaisesMessage(CommandError, 'Строки 2–4: '):
+            call_command('import_content', self.path[:-3], stdout=StringIO())
+
+    def test_comment_without_post_rejected(self):
+        """Комментарий к отсутствующему посту даёт понятную ошибку."""
+        with open(self.path[:-3], 'w') as stream:
+            stream.write('{"type":"user","username":"auth"}\n')
+            stream.write('{"type":"post","id":1,"author":"auth",'
+                         '"text":"Пост"}\n')
+            stream.write('{"type":"comment","id":1,"post":1,'
+                         '"author":"auth","text":"Да"}\n')
+            stream.write('{"type":"comment","id":2,"post":7,'
+                         '"author":"auth","parent":5,"text":"Нет"}\n')
+        with self.assertRaisesMessage(CommandError,
+                                      'Строки 3–4: не найдены посты: 7'):
+            call_command('import_content', self.path[:-3], stdout=StringIO())
+        self.assertFalse(Post.objects.exists())
+
+    def test_reply_without_parent_rejected(self):
+        """Ответ на отсутствующий комментарий даёт понятную ошибку."""
+        with open(self.path[:-3], 'w') as stream:
+            stream.write('{"type":"user","username":"auth"}\n')
+            stream.write('{"type":"post","id":1,"author":"auth",'
+                         '"text":"Пост"}\n')
+            stream.write('{"type":"comment","id":2,"post":1,'
+                         '"author":"auth","parent":5,"text":"Нет"}\n')
+        with self.assertRaisesMessage(CommandError,
+                                      'Строка 3: не найдены комментарии: 5'):
+            call_command('import_content', self.path[:-3], stdout=StringIO())
+
+
+class GenerateDataTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_data', users=30, groups=3, posts=60,
+                     comments=120, follows=4, stdout=StringIO())
+
+    def test_dataset_is_consistent(self):
+        """Сгенерированные данные согласованы со счётчиками и лентами."""
+        self.assertEqual(Post.objects.count(), 60)
+        self.assertEqual(Comment.objects.count(), 120)
+        profiles = Profile.objects.all()
+        self.assertEqual(sum(p.posts_count for p in profiles), 60)
+        self.assertEqual(sum(p.following_count for p in profiles),
+                         Follow.objects.count())
+        self.assertTrue(TimelineEntry.objects.exists())
+        word = Post.objects.first().text.split()[0]
+        self.assertTrue(get_backend().search(word, 1))
+        for reply in Comment.objects.filter(depth__gt=0).select_related(
+                'parent'):
+            self.assertTrue(reply.path.startswith(reply.parent.path + '/'))
+            self.assertGreaterEqual(reply.created, reply.parent.created)
+
+
+class BenchmarkUrlsTests(TransactionTestCase):
+    def test_benchmark_reports_every_url(self):
+        """Бенчмарк обходит адреса posts и выдаёт отчёт в JSON."""
+        call_command('generate_data', users=10, groups=2, posts=20,
+                     comments=30, follows=3, stdout=StringIO())
+        out = StringIO()
+        call_command('benchmark_urls', requests=2, concurrency=1,
+                     writes=True, stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertIn('post_detail', report['urls'])
+        self.assertIn('add_comment', report['urls'])
+        for name, stats in report['urls'].items():
+            self.assertEqual(stats['errors'], 0, name)
+            self.assertIsNotNone(stats['queries_p50'], name)
@@ -2,6 +2,9 @@ import tempfile
 import shutil
 
 from http import HTTPStatus
+from io import BytesIO
+
+from PIL import Image
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
@@ -70,6 +73,56 @@ class PostFormTests(TestCase):
         self.assertEqual(Post.objects.count(),
                          posts_count + 1)
 
+    @override_settings(POST_IMAGE_MAX_SIZE=100)
+    def test_uploaded_image_is_resized_and_stripped(self):
+        """Загруженное фото уменьшается и теряет EXIF."""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x010F] = 'Camera'
+        buffer = BytesIO()
+        Image.new('RGB', (400, 200), 'red').save(
+            buffer, format='JPEG', exif=exif)
+        uploaded = SimpleUploadedFile(
+            name='photo.jpg',
+            content=buffer.getvalue(),
+            content_type='image/jpeg'
+        )
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Фото', 'image': uploaded},
+            follow=True
+        )
+        post = Post.objects.get(text='Фото')
+        with Image.open(post.image) as image:
+            self.assertEqual(image.size, (50, 100))
+            self.assertFalse(image.getexif())
+
+    def test_invalid_uploads_are_rejected(self):
+        """Не-картинки, пустые, обрезанные, огромные и тяжёлые файлы
+        отклоняются."""
+        png = BytesIO()
+        Image.new('RGB', (20, 10)).save(png, format='PNG')
+        cases = (
+            ('notes.txt', b'just text', {}),
+            ('empty.png', b'', {}),
+            ('cut.png', png.getvalue()[:16], {}),
+            ('wide.png', png.getvalue(), {'POST_IMAGE_MAX_DIMENSION': 10}),
+            ('huge.png', png.getvalue(), {'POST_IMAGE_MAX_PIXELS': 100}),
+            ('heavy.png', png.getvalue(), {'POST_IMAGE_UPLOAD_MAX_SIZE': 10}),
+        )
+        posts_count = Post.objects.count()
+        for name, content, limits in cases:
+            with self.subTest(name=name), override_settings(**limits):
+                response = self.authorized_client.post(
+                    reverse('posts:post_create'),
+                    data={'text': name,
+                          'image': SimpleUploadedFile(name, content)},
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertTrue(response.context['form'].errors)
+                self.assertContains(response, 'text-danger')
+        self.assertEqual(Post.objects.count(), posts_count)
+
     def test_can_edit_post(self):
         """Проверка прав редактирования."""
         self.post = Post.objects.create(text='Тестовый текст',
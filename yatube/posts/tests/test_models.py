@@ -1,10 +1,31 @@
+import shutil
+import tempfile
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from core.models import MediaBlob
+from users.models import Profile
 
-from ..models import Group, Post
+from .. import thumbnails
+from ..models import Comment, Follow, Group, Post
 
 User = get_user_model()
 
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
 
 class PostModelTest(TestCase):
     @classmethod
@@ -59,3 +80,164 @@ class PostModelTest(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(
                     post._meta.get_field(field).help_text, expected_value)
+
+
+class CountersTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+
+    def profile(self, user):
+        return Profile.objects.get(user=user)
+
+    def test_posts_count(self):
+        """Счётчик постов автора следует за созданием и удалением."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        Post.objects.create(author=self.author, text='Ещё пост')
+        self.assertEqual(self.profile(self.author).posts_count, 2)
+        post.delete()
+        self.assertEqual(self.profile(self.author).posts_count, 1)
+
+    def test_group_posts_count(self):
+        """Счётчик постов группы следует за созданием, переносом
+        и удалением."""
+        first = Group.objects.create(title='Первая', slug='first')
+        second = Group.objects.create(title='Вторая', slug='second')
+        post = Post.objects.create(author=self.author, text='Пост',
+                                   group=first)
+        Post.objects.create(author=self.author, text='Без группы')
+
+        def counts():
+            return list(Group.objects.order_by('slug').values_list(
+                'slug', 'posts_count'))
+
+        self.assertEqual(counts(), [('first', 1), ('second', 0)])
+        post.group = second
+        post.save()
+        self.assertEqual(counts(), [('first', 0), ('second', 1)])
+        post.delete()
+        self.assertEqual(counts(), [('first', 0), ('second', 0)])
+
+    def test_comments_count(self):
+        """Счётчик комментариев поста следует за комментариями."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        comment = Comment.objects.create(post=post, author=self.reader,
+                                         text='Комментарий')
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_follow_counts(self):
+        """Счётчики подписчиков и подписок следуют за подписками."""
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.profile(self.author).followers_count, 1)
+        self.assertEqual(self.profile(self.reader).following_count, 1)
+        follow.delete()
+        self.assertEqual(self.profile(self.author).followers_count, 0)
+        self.assertEqual(self.profile(self.reader).following_count, 0)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class CommentThreadTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def reply(self, parent, text):
+        return Comment.objects.create(post=self.post, author=self.user,
+                                      parent=parent, text=text)
+
+    def test_thread_is_loaded_in_tree_order(self):
+        """Ветка загружается одним запросом в порядке обхода дерева."""
+        root = self.reply(None, 'корень')
+        first = self.reply(root, 'первый')
+        second = self.reply(root, 'второй')
+        self.reply(first, 'ответ на первый')
+        self.reply(None, 'другая ветка')
+        with self.assertNumQueries(1):
+            texts = [comment.text
+                     for comment in Comment.objects.thread(root.pk)]
+        self.assertEqual(
+            texts, ['корень', 'первый', 'ответ на первый', 'второй'])
+        self.assertEqual(second.depth, 1)
+
+    @override_settings(COMMENT_MAX_DEPTH=2)
+    def test_depth_limit(self):
+        """Ответ глубже лимита прикрепляется к родителю своего родителя."""
+        comment = self.reply(None, 'корень')
+        for index in range(4):
+            comment = self.reply(comment, f'ответ {index}')
+        self.assertEqual(comment.depth, 2)
+        self.assertEqual(comment.parent.depth, 1)
+
+    def test_path_is_stored_before_post_save(self):
+        """К сигналу post_save путь и ветка комментария уже записаны."""
+        stored = []
+
+        def remember(sender, instance, **kwargs):
+            stored.append(Comment.objects.values_list(
+                'path', 'thread_id').get(pk=instance.pk))
+
+        post_save.connect(remember, sender=Comment)
+        try:
+            root = self.reply(None, 'корень')
+            reply = self.reply(root, 'ответ')
+        finally:
+            post_save.disconnect(remember, sender=Comment)
+        self.assertEqual(stored, [(root.path, root.pk),
+                                  (reply.path, root.pk)])
+        self.assertTrue(reply.path.startswith(f'{root.path}/'))
+
+
+class MediaBlobTest(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='auth')
+
+    def tearDown(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, name):
+        return Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(name, SMALL_GIF, 'image/gif'),
+        )
+
+    def test_duplicates_share_one_file(self):
+        """Одинаковые картинки хранятся одним файлом."""
+        first = self.create_post('first.gif')
+        second = self.create_post('second.GIF')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(first.image.name, r'^posts/\w{2}/\w{64}\.gif$')
+        self.assertEqual(
+            MediaBlob.objects.get(name=first.image.name).references, 2)
+
+    def test_unused_file_is_deleted(self):
+        """Файл удаляется вместе с последним постом, который его использует."""
+        first = self.create_post('first.gif')
+        second = self.create_post('second.gif')
+        name = first.image.name
+        storage = first.image.storage
+        first.delete()
+        self.assertTrue(storage.exists(name))
+        second.image = None
+        second.save()
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(MediaBlob.objects.filter(name=name).exists())
+
+    def test_reacquired_file_survives_cleanup(self):
+        """Файл не удаляется, если на него снова сослались до очистки."""
+        post = self.create_post('first.gif')
+        name = post.image.name
+        storage = post.image.storage
+        with transaction.atomic():
+            post.delete()
+            self.create_post('second.gif')
+        self.assertTrue(storage.exists(name))
+        self.assertEqual(MediaBlob.objects.get(name=name).references, 1)
+        MediaBlob.objects.release(name)
+        thumbnails.discard(name)
+        self.assertFalse(storage.exists(name))
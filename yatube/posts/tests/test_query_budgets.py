@@ -0,0 +1,121 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.testing import QueryBudgetMixin
+
+from ..models import Comment, Follow, Group, Post
+from ..utils import POSTS_PER_PAGE
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        authors = [cls.author] + [
+            User.objects.create_user(username=f'writer{index}')
+            for index in range(POSTS_PER_PAGE)
+        ]
+        for index, author in enumerate(authors):
+            Post.objects.create(text=f'Пост номер {index}', author=author,
+                                group=cls.group)
+            Follow.objects.create(user=cls.reader, author=author)
+        cls.post = Post.objects.create(
+            text='Пост с обсуждением', author=cls.author, group=cls.group,
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'))
+        cls.root = None
+        for author in authors:
+            comment = Comment.objects.create(
+                post=cls.post, author=author, text='Комментарий')
+            cls.root = cls.root or comment
+            Comment.objects.create(post=cls.post, author=author,
+                                   parent=comment, text='Ответ')
+        for author in authors:
+            Comment.objects.create(post=cls.post, author=author,
+                                   parent=cls.root, text='Ещё ответ')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def assertBudgets(self, budgets, method='get'):
+        for name, args, data, budget in budgets:
+            with self.subTest(url=name):
+                cache.clear()
+                request = getattr(self.client, method)
+                with self.assertQueryBudget(budget):
+                    request(reverse(f'posts:{name}', args=args), data)
+
+    def test_feed_budgets(self):
+        """Ленты и страницы поста укладываются в бюджет запросов."""
+        post_id = self.post.pk
+        self.assertBudgets((
+            ('index', (), None, 6),
+            ('group_index', (), None, 5),
+            ('group_list', (self.group.slug,), None, 7),
+            ('profile', (self.author.username,), None, 9),
+            ('search', (), {'q': 'Пост'}, 4),
+            ('post_detail', (post_id,), None, 8),
+            ('post_comments', (post_id,), None, 6),
+            ('comment_thread', (post_id, self.root.pk), None, 4),
+            ('follow_index', (), None, 7),
+        ))
+
+    def test_api_budgets(self):
+        """API укладывается в бюджет запросов."""
+        post_id = self.post.pk
+        self.assertBudgets((
+            ('api_index', (), None, 3),
+            ('api_group_list', (self.group.slug,), None, 4),
+            ('api_profile', (self.author.username,), None, 5),
+            ('api_follow_index', (), None, 4),
+            ('api_post_detail', (post_id,), None, 3),
+            ('api_comments', (post_id,), None, 4),
+        ))
+
+    def test_form_page_budgets(self):
+        """Формы создания и редактирования укладываются в бюджет."""
+        self.client.force_login(self.author)
+        self.assertBudgets((
+            ('post_create', (), None, 3),
+            ('post_edit', (self.post.pk,), None, 5),
+        ))
+
+    def test_write_budgets(self):
+        """Запись комментария, поста и подписки укладывается в бюджет."""
+        self.assertBudgets((
+            ('add_comment', (self.post.pk,), {'text': 'Новый'}, 10),
+            ('post_create', (), {'text': 'Новый пост'}, 9),
+            ('profile_unfollow', (self.author.username,), None, 12),
+            ('profile_follow', (self.author.username,), None, 14),
+        ), method='post')
+        self.client.force_login(self.author)
+        self.assertBudgets((
+            ('post_edit', (self.post.pk,), {'text': 'Правка'}, 10),
+        ), method='post')
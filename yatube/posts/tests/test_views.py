@@ -1,5 +1,7 @@
 import tempfile
 import shutil
+from http import HTTPStatus
+from unittest import mock
 
 from django.contrib.auth import get_user_model
 from django.test import Client, TestCase, override_settings
@@ -7,10 +9,19 @@ from django.urls import reverse
 from django import forms
 from django.conf import settings
 from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.core.files.uploadedfile import SimpleUploadedFile
 
-from ..models import Follow, Post, Group
+from users.models import Profile
+
+from ..models import Comment, Follow, Post, Group, TimelineEntry
+from .. import timeline
 from ..forms import PostForm
+from ..groups import registry
+from ..thumbnails import generate, ready_variants
+from ..utils import (COMMENTS_PER_PAGE, NUMBERED_PAGES_LIMIT, POSTS_PER_PAGE,
+                     encode_cursor)
 
 POSTS_TO_CREATE = 20
 AMOUNT_OF_POSTS = 10
@@ -135,19 +146,431 @@ class ViewsTest(TestCase):
         self.assertNotIn(post, profile)
 
     def test_cache(self):
+        """Главная отдаётся из кэша до изменения постов."""
         response = self.authorized_client.get(
             reverse('posts:index'))
         with_cache = response.content
+        Post.objects.filter(pk=self.post.pk).update(text='Новый текст')
+        response = self.authorized_client.get(
+            reverse('posts:index'))
+        self.assertEqual(with_cache, response.content)
         self.post.delete()
         response = self.authorized_client.get(
             reverse('posts:index'))
-        after_deleting_post = response.content
+        self.assertNotEqual(with_cache, response.content)
+        self.assertNotContains(response, 'Новый текст')
+
+    def test_group_and_profile_cache_invalidation(self):
+        """Новый пост сразу появляется в группе и профиле автора."""
+        pages = (reverse('posts:group_list',
+                         kwargs={'slug': self.group.slug}),
+                 reverse('posts:profile',
+                         kwargs={'username': self.user.username}))
+        for page in pages:
+            self.guest_client.get(page)
+        Post.objects.create(text='Свежий пост',
+                            group=self.group,
+                            author=self.user)
+        for page in pages:
+            with self.subTest(page=page):
+                response = self.guest_client.get(page)
+                self.assertContains(response, 'Свежий пост')
+
+    def test_follow_invalidates_profile_cache(self):
+        """Подписка сразу меняет кнопку в профиле автора."""
+        url = reverse('posts:profile',
+                      kwargs={'username': self.user2.username})
+        Post.objects.create(text='Пост автора', author=self.user2)
+        self.authorized_client.get(url)
+        self.authorized_client.get(
+            reverse('posts:profile_follow',
+                    kwargs={'username': self.user2.username}))
+        response = self.authorized_client.get(url)
+        self.assertContains(response, 'Отписаться')
+
+
+class MissingProfileTests(TestCase):
+    def test_author_without_profile(self):
+        """Страницы автора без профиля открываются и создают профиль."""
+        User.objects.bulk_create([User(username='imported')])
+        author = User.objects.get(username='imported')
+        post = Post.objects.create(text='Пост', author=author)
+        Profile.objects.filter(user=author).delete()
+        for url in (reverse('posts:profile', args=[author.username]),
+                    reverse('posts:post_detail', args=[post.pk])):
+            with self.subTest(url=url):
+                cache.clear()
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(Profile.objects.get(user=author).posts_count, 1)
+
+
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(title='Тестовая группа',
+                                         slug='test_group')
+        cls.posts_count = POSTS_PER_PAGE * NUMBERED_PAGES_LIMIT + 5
+        Post.objects.bulk_create(
+            Post(text=f'Тестовый текст {num}',
+                 group=cls.group,
+                 author=cls.user)
+            for num in range(cls.posts_count)
+        )
+
+    def setUp(self):
         cache.clear()
-        response = response = self.authorized_client.get(
-            reverse('posts:index'))
-        after_clearing_cache = response.content
-        self.assertEqual(with_cache, after_deleting_post)
-        self.assertNotEqual(after_deleting_post, after_clearing_cache)
+        self.client = Client()
+
+    def test_large_feeds_use_cursor_pages(self):
+        """Большие ленты листаются курсором и отдают все посты по разу."""
+        pages = (reverse('posts:index'),
+                 reverse('posts:profile',
+                         kwargs={'username': self.user.username}),
+                 reverse('posts:group_list',
+                         kwargs={'slug': self.group.slug}))
+        for page in pages:
+            with self.subTest(page=page):
+                seen = []
+                params = {}
+                while True:
+                    response = self.client.get(page, params)
+                    page_obj = response.context['page_obj']
+                    self.assertTrue(page_obj.is_cursor)
+                    self.assertLessEqual(len(page_obj), POSTS_PER_PAGE)
+                    seen.extend(post.pk for post in page_obj)
+                    if not page_obj.has_next():
+                        break
+                    params = {'after': page_obj.next_cursor}
+                self.assertEqual(len(seen), self.posts_count)
+                self.assertEqual(len(set(seen)), self.posts_count)
+
+    def test_before_cursor_returns_previous_page(self):
+        """Курсор before возвращает предыдущую страницу."""
+        url = reverse('posts:index')
+        first = self.client.get(url).context['page_obj']
+        second = self.client.get(
+            url, {'after': first.next_cursor}).context['page_obj']
+        previous = self.client.get(
+            url, {'before': second.previous_cursor}).context['page_obj']
+        self.assertEqual(list(previous), list(first))
+        self.assertFalse(previous.has_previous())
+
+    def test_cursor_page_skips_count_query(self):
+        """Страница по курсору не выполняет COUNT."""
+        first = self.client.get(reverse('posts:index')).context['page_obj']
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('posts:index'),
+                            {'after': first.next_cursor})
+        self.assertFalse(any('COUNT(' in query['sql']
+                             for query in queries.captured_queries))
+
+    def test_broken_cursor_shows_first_page(self):
+        """Испорченный курсор открывает первую страницу."""
+        response = self.client.get(reverse('posts:index'),
+                                   {'after': 'broken'})
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_mistyped_cursor_values_show_first_page(self):
+        """Курсор с null или не строковыми значениями не ломает ленту."""
+        first = self.client.get(reverse('posts:index')).context['page_obj']
+        for values in ([None, None], [True, 1], [[1], {}]):
+            for param in ('after', 'before'):
+                with self.subTest(values=values, param=param):
+                    response = self.client.get(
+                        reverse('posts:index'),
+                        {param: encode_cursor(values)})
+                    self.assertEqual(response.status_code, HTTPStatus.OK)
+                    self.assertEqual(list(response.context['page_obj']),
+                                     list(first))
+
+
+class FeedQueriesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(title='Тестовая группа',
+                                         slug='test_group')
+        authors = [User.objects.create_user(username=f'author{num}')
+                   for num in range(AMOUNT_OF_POSTS)]
+        Post.objects.bulk_create(
+            Post(text=f'Тестовый текст {num}',
+                 group=Group.objects.create(title=f'Группа {num}',
+                                            slug=f'group_{num}'),
+                 author=author)
+            for num, author in enumerate(authors)
+        )
+        for author in authors:
+            Follow.objects.create(user=cls.user, author=author)
+        Post.objects.bulk_create(
+            Post(text=f'Тестовый текст {num}',
+                 group=cls.group,
+                 author=cls.user)
+            for num in range(AMOUNT_OF_POSTS)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_feed_query_count(self):
+        """Ленты выполняют фиксированное число запросов на страницу."""
+        pages = {
+            reverse('posts:index'): (5, 2),
+            reverse('posts:group_list',
+                    kwargs={'slug': self.group.slug}): (6, 2),
+            reverse('posts:profile',
+                    kwargs={'username': self.user.username}): (8, 3),
+            reverse('posts:follow_index'): (6, 5),
+        }
+        for page, (cold, warm) in pages.items():
+            with self.subTest(page=page):
+                with self.assertNumQueries(cold):
+                    self.authorized_client.get(page)
+                with self.assertNumQueries(warm):
+                    self.authorized_client.get(page)
+
+
+class GroupDirectoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.empty = Group.objects.create(title='Без постов', slug='empty')
+        cls.group = Group.objects.create(title='Активная', slug='active',
+                                         description='Описание')
+        for index in range(3):
+            Post.objects.create(text=f'Пост {index}', author=cls.user,
+                                group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_directory_lists_groups_with_counts(self):
+        """Каталог показывает группы, число постов и последний пост."""
+        response = self.client.get(reverse('posts:group_index'))
+        entries = response.context['entries']
+        self.assertEqual(
+            [(entry['group'], entry['posts_count']) for entry in entries],
+            [(self.group, 3), (self.empty, 0)])
+        self.assertEqual(entries[0]['latest'].text, 'Пост 2')
+        self.assertIsNone(entries[1]['latest'])
+
+    def test_directory_follows_new_posts(self):
+        """Новый пост обновляет счётчик и превью в каталоге."""
+        self.client.get(reverse('posts:group_index'))
+        Post.objects.create(text='Свежий', author=self.user, group=self.empty)
+        response = self.client.get(reverse('posts:group_index'))
+        entry = response.context['entries'][1]
+        self.assertEqual(entry['posts_count'], 1)
+        self.assertEqual(entry['latest'].text, 'Свежий')
+
+    def test_registry_is_shared_until_group_changes(self):
+        """Список групп читается из памяти до изменения группы."""
+        registry.all()
+        with self.assertNumQueries(0):
+            self.assertEqual(registry.by_slug('active'), self.group)
+            self.assertIsNone(registry.by_slug('missing'))
+        self.group.title = 'Переименованная'
+        self.group.save()
+        self.assertEqual(registry.get(self.group.pk).title,
+                         'Переименованная')
+
+    def test_post_form_reads_groups_from_registry(self):
+        """Форма поста берёт группы из реестра без запросов."""
+        registry.all()
+        form = PostForm({'text': 'Текст', 'group': self.group.pk})
+        with self.assertNumQueries(0):
+            html = str(form['group'])
+            group = form.fields['group'].clean(self.group.pk)
+        self.assertEqual(group, self.group)
+        self.assertTrue(form.is_valid())
+        self.assertEqual(html.count('<option'), 3)
+        self.assertEqual(html.count('selected'), 1)
+        self.assertEqual(form.cleaned_data['group'], self.group)
+        form = PostForm({'text': 'Текст', 'group': 0})
+        self.assertIn('group', form.errors)
+
+
+class PostCardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='auth')
+        self.group = Group.objects.create(title='Тестовая группа',
+                                          slug='test_group')
+        self.post = Post.objects.create(text='Тестовый текст',
+                                        group=self.group,
+                                        author=self.user)
+        self.url = reverse('posts:group_list',
+                           kwargs={'slug': self.group.slug})
+
+    def test_card_is_served_from_cache(self):
+        """Карточка поста берётся из кэша, пока пост не менялся."""
+        self.client.get(self.url)
+        Post.objects.filter(pk=self.post.pk).update(text='Новый текст')
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Тестовый текст')
+
+    def test_card_invalidated_on_post_save(self):
+        """Сохранение поста сбрасывает его карточку."""
+        self.client.get(self.url)
+        self.post.text = 'Новый текст'
+        self.post.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Новый текст')
+
+    def test_card_invalidated_on_author_save(self):
+        """Изменение автора сбрасывает карточки его постов."""
+        self.client.get(self.url)
+        self.user.first_name = 'Лев'
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Лев')
+
+
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(text='Популярный пост',
+                                       author=cls.author)
+        cls.quiet_post = Post.objects.create(text='Тихий пост',
+                                             author=cls.author)
+        for index in range(COMMENTS_PER_PAGE + 5):
+            user = User.objects.create_user(username=f'reader{index}')
+            Comment.objects.create(post=cls.post, author=user,
+                                   text=f'Комментарий {index}')
+        Comment.objects.create(post=cls.quiet_post, author=cls.author,
+                               text='Единственный')
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('posts:post_detail',
+                           kwargs={'post_id': self.post.pk})
+
+    def test_first_page_and_fragment(self):
+        """Комментарии выводятся страницами, остальное — фрагментом."""
+        response = self.client.get(self.url)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_PER_PAGE)
+        self.assertEqual(comments[0].text, 'Комментарий 0')
+        self.assertTrue(comments.has_next())
+        response = self.client.get(
+            reverse('posts:post_comments', kwargs={'post_id': self.post.pk}),
+            {'after': comments.next_cursor},
+        )
+        self.assertEqual(len(response.context['comments']), 5)
+        self.assertNotContains(response, 'Показать ещё')
+
+    def test_newest_first(self):
+        """Параметр comments=newest показывает новые комментарии первыми."""
+        response = self.client.get(self.url, {'comments': 'newest'})
+        self.assertEqual(response.context['comments'][0].text,
+                         f'Комментарий {COMMENTS_PER_PAGE + 4}')
+
+    @override_settings(COMMENT_REPLIES_PREVIEW=2)
+    def test_replies_preview_and_thread(self):
+        """Под веткой видны первые ответы, остальные — фрагментом."""
+        root = Comment.objects.get(text='Комментарий 0')
+        replies = COMMENTS_PER_PAGE + 4
+        for index in range(replies):
+            Comment.objects.create(post=self.post, author=self.author,
+                                   parent=root, text=f'Ответ {index}')
+        response = self.client.get(self.url)
+        texts = [comment.text for comment in response.context['comments']]
+        self.assertEqual(texts[:4], ['Комментарий 0', 'Ответ 0', 'Ответ 1',
+                                     'Комментарий 1'])
+        root = response.context['comments'][0]
+        self.assertEqual(root.hidden_replies, replies - 2)
+        url = reverse('posts:comment_thread', args=[self.post.pk, root.pk])
+        page = self.client.get(
+            url, {'after': root.replies_cursor}).context['comments']
+        self.assertEqual(len(page), COMMENTS_PER_PAGE)
+        self.assertEqual(page[0].text, 'Ответ 2')
+        self.assertTrue(page.has_next())
+        page = self.client.get(
+            url, {'after': page.next_cursor}).context['comments']
+        self.assertEqual([comment.text for comment in page],
+                         [f'Ответ {index}'
+                          for index in range(COMMENTS_PER_PAGE + 2, replies)])
+        self.assertFalse(page.has_next())
+
+    def test_reply_through_form(self):
+        """Ответ на комментарий попадает в его ветку."""
+        root = Comment.objects.get(text='Единственный')
+        self.client.force_login(self.author)
+        self.client.post(
+            reverse('posts:add_comment', args=[self.quiet_post.pk]),
+            {'text': 'Ответ', 'parent': root.pk},
+        )
+        reply = Comment.objects.get(text='Ответ')
+        self.assertEqual((reply.parent, reply.thread, reply.depth),
+                         (root, root, 1))
+
+    def test_query_count_does_not_grow(self):
+        """Число запросов не зависит от количества комментариев."""
+        quiet_url = reverse('posts:post_detail',
+                            kwargs={'post_id': self.quiet_post.pk})
+        with CaptureQueriesContext(connection) as quiet:
+            self.client.get(quiet_url)
+        with self.assertNumQueries(len(quiet)):
+            self.client.get(self.url)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.reader = User.objects.create_user(username='reader')
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.group = Group.objects.create(title='Тестовая группа',
+                                          slug='test_group')
+        self.post = Post.objects.create(text='Тестовый текст',
+                                        group=self.group,
+                                        author=self.user)
+
+    def revalidate(self, url, change):
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_group_page(self):
+        """Страница группы не меняется, пока в группе нет новых постов."""
+        self.revalidate(
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            lambda: Post.objects.create(
+                text='Новый', group=self.group, author=self.user),
+        )
+
+    def test_profile_page(self):
+        """Профиль устаревает после подписки на автора."""
+        self.revalidate(
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+            lambda: Follow.objects.create(user=self.reader, author=self.user),
+        )
+
+    def test_post_detail_page(self):
+        """Страница поста устаревает после нового комментария."""
+        self.revalidate(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            lambda: Comment.objects.create(
+                post=self.post, author=self.reader, text='Комментарий'),
+        )
+
+    def test_etag_depends_on_user(self):
+        """ETag разный для разных пользователей."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.assertNotEqual(self.client.get(url)['ETag'],
+                            Client().get(url)['ETag'])
 
 
 class FollowPagesTests(TestCase):
@@ -213,6 +636,111 @@ class FollowPagesTests(TestCase):
         self.assertEqual(posts_cnt_new, 0)
 
 
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает в материализованную ленту подписчика."""
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.subscriber, post=post).exists())
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.subscriber_2, post=post).exists())
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка заполняет ленту постами автора, отписка очищает."""
+        self.subscriber_2_client.get(
+            reverse('posts:profile_follow', kwargs={'username': self.author})
+        )
+        response = self.subscriber_2_client.get(reverse(
+            'posts:follow_index'))
+        self.assertIn(self.post, response.context['page_obj'])
+        self.subscriber_2_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': self.author})
+        )
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.subscriber_2).exists())
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_posts_pulled_on_read(self):
+        """Посты популярных авторов подтягиваются при чтении ленты."""
+        post = Post.objects.create(text='Пост популярного автора',
+                                   author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        response = self.authorized_client.get(reverse(
+            'posts:follow_index'))
+        self.assertIn(post, response.context['page_obj'])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_author_back_under_limit_catches_up_followers(self):
+        """Автор, вернувшийся под лимит рассылки, догоняет ленты
+        оставшихся подписчиков."""
+        Follow.objects.create(user=self.subscriber_2, author=self.author)
+        post = Post.objects.create(text='Пост популярного автора',
+                                   author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.subscriber_2_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': self.author})
+        )
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertIn(post, response.context['page_obj'])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0, TIMELINE_BACKFILL=2)
+    def test_pull_catches_up_past_batch(self):
+        """Подтягивание ленты догоняет все посты, а не последнюю пачку."""
+        Post.objects.bulk_create(
+            Post(text=f'Пост {index}', author=self.author)
+            for index in range(5))
+        cache.clear()
+        with mock.patch('posts.timeline.BATCH_SIZE', 2):
+            timeline.pull(self.subscriber)
+        self.assertEqual(
+            TimelineEntry.objects.filter(
+                user=self.subscriber, post__text__startswith='Пост ').count(),
+            5)
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(text='Рецепт борща со сметаной',
+                                       author=cls.user)
+        cls.rich_post = Post.objects.create(
+            text='Борщ, борщ и ещё раз борщ', author=cls.user)
+        cls.commented = Post.objects.create(text='Фото с дачи',
+                                            author=cls.user)
+        Comment.objects.create(post=cls.commented, author=cls.user,
+                               text='Отличные помидоры')
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, query):
+        response = self.client.get(reverse('posts:search'), {'q': query})
+        return list(response.context['page_obj'])
+
+    def test_search_ranks_posts(self):
+        """Поиск находит посты и ранжирует их по релевантности."""
+        self.assertEqual(self.search('борщ'), [self.rich_post, self.post])
+
+    def test_search_by_comment_and_prefix(self):
+        """Поиск находит пост по тексту комментария и началу слова."""
+        self.assertEqual(self.search('помид'), [self.commented])
+
+    def test_deleted_post_leaves_index(self):
+        """Удалённый пост исчезает из выдачи."""
+        post = Post.objects.create(text='Временный пост', author=self.user)
+        self.assertEqual(self.search('временный'), [post])
+        post.delete()
+        self.assertEqual(self.search('временный'), [])
+
+    @override_settings(
+        POSTS_SEARCH_BACKEND='posts.search.SimpleSearchBackend')
+    def test_simple_backend(self):
+        """Запасной поиск через icontains находит те же посты."""
+        self.assertEqual(set(self.search('борщ')),
+                         {self.rich_post, self.post})
+
+
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostImageTests(TestCase):
     @classmethod
@@ -281,3 +809,30 @@ class PostImageTests(TestCase):
             reverse('posts:post_detail', kwargs={'post_id': self.post.id})
         )
         self.assertEqual(response.context['post'].image, self.post.image)
+
+    def test_card_falls_back_to_original_until_thumbnail_ready(self):
+        """До готовности миниатюры карточка показывает оригинал."""
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        response = self.authorized_client.get(url)
+        self.assertContains(response, self.post.image.url)
+        self.assertTrue(generate(self.post.pk))
+        response = self.authorized_client.get(url)
+        self.assertNotContains(response, self.post.image.url)
+        self.assertContains(response, 'cache/')
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, '480w')
+
+    def test_variants_are_looked_up_in_one_query(self):
+        """Готовность всех миниатюр проверяется одним запросом и кэшируется."""
+        image = self.post.image
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(ready_variants(image), {})
+        self.assertEqual(len(queries.captured_queries), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(ready_variants(image), {})
+        generate(self.post.pk)
+        with self.assertNumQueries(0):
+            self.assertIn('WEBP', ready_variants(image))
+        cache.clear()
+        with self.assertNumQueries(1):
+            self.assertIn('WEBP', ready_variants(image))
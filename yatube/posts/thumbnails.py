@@ -0,0 +1,160 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.base import EXTENSIONS, ThumbnailBackend
+from sorl.thumbnail.conf import defaults as thumbnail_defaults
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore as CachedDbStore
+from sorl.thumbnail.models import KVStore
+
+from core.models import MediaBlob
+
+from .cache import bump_versions, post_feed_scopes
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+Image.init()
+if 'AVIF' in Image.SAVE:
+    EXTENSIONS.setdefault('AVIF', 'avif')
+
+MIME_TYPES = {
+    'AVIF': 'image/avif',
+    'WEBP': 'image/webp',
+    'JPEG': 'image/jpeg',
+}
+
+
+class PostThumbnailBackend(ThumbnailBackend):
+    def normalize_options(self, source, options):
+        options = dict(options)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(thumbnail_defaults, attr):
+                options.setdefault(key, value)
+        return options
+
+    def thumbnail_file(self, file_, geometry_string, **options):
+        source = ImageFile(file_)
+        options = self.normalize_options(source, options)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+
+def stored_thumbnails(files):
+    kvstore = default.kvstore
+    if not isinstance(kvstore, CachedDbStore):
+        found = {file.key: kvstore.get(file) for file in files}
+        return {key: image for key, image in found.items() if image}
+    keys = {add_prefix(file.key): file.key for file in files}
+    values = kvstore.cache.get_many(list(keys))
+    missing = [key for key in keys if key not in values]
+    if missing:
+        stored = dict(KVStore.objects.filter(
+            key__in=missing).values_list('key', 'value'))
+        fetched = {key: stored.get(key, EMPTY_VALUE) for key in missing}
+        kvstore.cache.set_many(
+            fetched, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT)
+        values.update(fetched)
+    return {
+        keys[key]: deserialize_image_file(value)
+        for key, value in values.items() if value != EMPTY_VALUE
+    }
+
+
+def image_formats():
+    return [
+        image_format for image_format in settings.POST_IMAGE_FORMATS
+        if image_format in Image.SAVE and image_format in EXTENSIONS
+    ]
+
+
+def variant_sizes():
+    card_width, card_height = settings.POST_IMAGE_GEOMETRY
+    for image_format in image_formats():
+        for width in settings.POST_IMAGE_WIDTHS:
+            height = round(width * card_height / card_width)
+            yield image_format, width, f'{width}x{height}', {
+                'crop': 'center',
+                'upscale': True,
+                'format': image_format,
+            }
+
+
+def ready_variants(image):
+    sizes = list(variant_sizes())
+    files = [
+        default.backend.thumbnail_file(image, geometry, **options)
+        for _, _, geometry, options in sizes
+    ]
+    ready = stored_thumbnails(files)
+    variants = {}
+    for (image_format, width, _, _), file in zip(sizes, files):
+        thumbnail = ready.get(file.key)
+        if thumbnail:
+            variants.setdefault(image_format, []).append(
+                (thumbnail.url, width))
+    return variants
+
+
+def discard(name):
+    with transaction.atomic():
+        blob = MediaBlob.objects.select_for_update().filter(
+            name=name, references=0).first()
+        if blob is None:
+            return
+        blob.delete()
+        storage = Post._meta.get_field('image').storage
+        default.backend.delete(ImageFile(name, storage))
+
+
+@lru_cache(maxsize=None)
+def executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.THUMBNAIL_WORKERS,
+        thread_name_prefix='thumbnails',
+    )
+
+
+def generate(post_id):
+    post = Post.objects.only(
+        'image', 'author', 'group').filter(pk=post_id).first()
+    if post is None or not post.image:
+        return False
+    for _, _, geometry, options in variant_sizes():
+        default.backend.get_thumbnail(post.image, geometry, **options)
+    bump_versions(f'post:{post.pk}', *post_feed_scopes(post))
+    return True
+
+
+def generate_in_worker(post_id):
+    close_old_connections()
+    try:
+        return generate(post_id)
+    except Exception:
+        logger.exception('Не удалось подготовить миниатюры поста %s', post_id)
+        return False
+    finally:
+        close_old_connections()
+
+
+def schedule(post):
+    if not post.image:
+        return
+    if settings.THUMBNAIL_ASYNC:
+        transaction.on_commit(
+            lambda: executor().submit(generate_in_worker, post.pk))
+    else:
+        transaction.on_commit(lambda: generate(post.pk))
@@ -0,0 +1,123 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max, Q
+
+from users.models import Profile
+
+from .models import FEED_FIELDS, Follow, Post, TimelineEntry
+
+PULLED_AUTHORS_KEY = 'posts:timeline:pulled'
+PULLED_AUTHORS_TIMEOUT = 60 * 5
+BATCH_SIZE = 500
+
+
+def pulled_authors():
+    return cache.get_or_set(
+        PULLED_AUTHORS_KEY,
+        lambda: set(
+            Profile.objects.filter(
+                followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+            ).values_list('user_id', flat=True)
+        ),
+        PULLED_AUTHORS_TIMEOUT,
+    )
+
+
+def _entries(user_ids, posts):
+    return [
+        TimelineEntry(user_id=user_id, post_id=pk,
+                      author_id=author_id, pub_date=pub_date)
+        for user_id in user_ids
+        for pk, author_id, pub_date in posts
+    ]
+
+
+def followers_count(author_id):
+    return Profile.objects.filter(user_id=author_id).values_list(
+        'followers_count', flat=True).first() or 0
+
+
+def fan_out(post):
+    if followers_count(post.author_id) > settings.TIMELINE_FANOUT_LIMIT:
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    TimelineEntry.objects.bulk_create(
+        _entries(followers, [(post.pk, post.author_id, post.pub_date)]),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def _store(user_id, posts):
+    TimelineEntry.objects.bulk_create(
+        _entries([user_id], posts),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id, since=None):
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'author_id', 'pub_date')
+    if since is None:
+        _store(user_id, posts.order_by('-pub_date')[
+            :settings.TIMELINE_BACKFILL])
+        return
+    posts = posts.order_by('pub_date', 'pk')
+    batch = list(posts.filter(pub_date__gte=since)[:BATCH_SIZE])
+    while batch:
+        _store(user_id, batch)
+        if len(batch) < BATCH_SIZE:
+            break
+        pk, _, pub_date = batch[-1]
+        batch = list(posts.filter(
+            Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+        )[:BATCH_SIZE])
+
+
+def prune(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def catch_up(user_id, author_id):
+    since = TimelineEntry.objects.filter(
+        user_id=user_id, author_id=author_id
+    ).aggregate(since=Max('pub_date'))['since']
+    backfill(user_id, author_id, since)
+
+
+def followers_changed(author_id, delta):
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    count = followers_count(author_id)
+    if count - delta <= limit < count or count <= limit < count - delta:
+        cache.delete(PULLED_AUTHORS_KEY)
+    if count <= limit < count - delta:
+        followers = Follow.objects.filter(
+            author_id=author_id).values_list('user_id', flat=True)
+        for user_id in followers:
+            catch_up(user_id, author_id)
+
+
+def pull(user):
+    pulled = pulled_authors()
+    if not pulled:
+        return
+    authors = Follow.objects.filter(
+        user=user, author_id__in=pulled).values_list('author_id', flat=True)
+    for author_id in authors:
+        catch_up(user.pk, author_id)
+
+
+def timeline(user):
+    # Reading a timeline may write: posts of pulled authors are copied into
+    # it here, so GET follow_index and the API feed can INSERT rows and
+    # switch the rest of the request to the primary.
+    pull(user)
+    return entries(user)
+
+
+def entries(user):
+    return TimelineEntry.objects.filter(user=user).select_related(
+        'post__author', 'post__group'
+    ).only('pub_date', 'post', *(f'post__{name}' for name in FEED_FIELDS))
@@ -0,0 +1,240 @@
+import gzip
+import json
+import os
+from collections import Counter
+
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.db import reset_queries
+from django.utils import timezone
+
+from core.db.bulk import next_pk
+from core.models import MediaBlob
+
+from .models import Comment, Follow, Group, Post, User
+
+BATCH_SIZE = 2000
+
+EXPORTS = (
+    ('user', User, {
+        'username': 'username',
+        'first_name': 'first_name',
+        'last_name': 'last_name',
+        'email': 'email',
+        'date_joined': 'date_joined',
+    }),
+    ('group', Group, {
+        'slug': 'slug',
+        'title': 'title',
+        'description': 'description',
+    }),
+    ('post', Post, {
+        'id': 'pk',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'image': 'image',
+    }),
+    ('comment', Comment, {
+        'id': 'pk',
+        'post': 'post_id',
+        'author': 'author__username',
+        'parent': 'parent_id',
+        'text': 'text',
+        'created': 'created',
+    }),
+    ('follow', Follow, {
+        'user': 'user__username',
+        'author': 'author__username',
+    }),
+)
+USER_FIELDS = ('first_name', 'last_name', 'email', 'date_joined', 'password')
+
+
+class BatchError(Exception):
+    def __init__(self, first, last, error):
+        super().__init__(error)
+        self.first = first
+        self.last = last
+
+
+ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'),
+                           default=lambda value: value.isoformat())
+
+
+def open_stream(path, mode):
+    opener = gzip.open if path.endswith('.gz') else open
+    return opener(path, f'{mode}t', encoding='utf-8')
+
+
+def export_records(batch_size=BATCH_SIZE, passwords=False):
+    for kind, model, fields in EXPORTS:
+        if kind == 'user' and passwords:
+            fields = {**fields, 'password': 'password'}
+        rows = model.objects.order_by('pk').values_list(*fields.values())
+        for index, row in enumerate(rows.iterator(chunk_size=batch_size)):
+            if not index % batch_size:
+                reset_queries()
+            yield {'type': kind, **dict(zip(fields, row))}
+
+
+class Importer:
+    def __init__(self, batch_size=BATCH_SIZE, media_dir=None):
+        self.batch_size = batch_size
+        self.media_dir = media_dir
+        self.image_field = Post._meta.get_field('image')
+        self.now = timezone.now()
+        self.password = make_password(None)
+        self.users = {}
+        self.groups = {}
+        self.post_offset = next_pk(Post) - 1
+        self.comment_offset = next_pk(Comment) - 1
+        self.kind = None
+        self.pending = []
+        self.lines = None
+        self.images = Counter()
+        self.counts = Counter()
+
+    def add(self, record, line=None):
+        kind = record.get('type')
+        if not hasattr(self, f'create_{kind}s'):
+            raise ValueError(f'неизвестный тип записи {kind!r}')
+        if kind != self.kind or len(self.pending) >= self.batch_size:
+            self.flush()
+            self.kind = kind
+        if not self.pending:
+            self.lines = [line, line]
+        self.lines[1] = line
+        self.pending.append(record)
+
+    def flush(self):
+        if self.pending:
+            try:
+                getattr(self, f'create_{self.kind}s')(self.pending)
+            except (ValueError, KeyError, TypeError) as error:
+                raise BatchError(*self.lines, error) from error
+            self.counts[self.kind] += len(self.pending)
+            self.pending = []
+            reset_queries()
+
+    def finish(self):
+        self.flush()
+        for name, count in self.images.items():
+            MediaBlob.objects.acquire(name, count)
+        Comment.objects.fill_paths()
+        return self.counts
+
+    def lookup(self, ids, model, field, keys, strict=True):
+        missing = {key for key in keys if key and key not in ids}
+        if missing:
+            ids.update(model.objects.filter(
+                **{f'{field}__in': missing}).values_list(field, 'pk'))
+        unknown = missing - ids.keys()
+        if strict and unknown:
+            raise ValueError(
+                f'не найдены {field}: '
+                f'{", ".join(sorted(unknown)[:5])}')
+
+    def check_ids(self, model, ids, offset, known=()):
+        missing = set(ids) - set(known)
+        if missing:
+            missing -= set(model.objects.filter(
+                pk__in=missing).values_list('pk', flat=True))
+        if missing:
+            raise ValueError(
+                f'не найдены {model._meta.verbose_name_plural.lower()}: '
+                f'{", ".join(str(pk - offset) for pk in sorted(missing)[:5])}')
+
+    def create_users(self, records):
+        records = {record['username']: record for record in records}
+        self.lookup(self.users, User, 'username', records, strict=False)
+        User.objects.bulk_create(
+            User(username=username, password=self.password, **{
+                field: record[field] for field in USER_FIELDS
+                if record.get(field)
+            })
+            for username, record in records.items()
+            if username not in self.users
+        )
+        self.lookup(self.users, User, 'username', records)
+
+    def create_groups(self, records):
+        records = {record['slug']: record for record in records}
+        self.lookup(self.groups, Group, 'slug', records, strict=False)
+        Group.objects.bulk_create(
+            Group(slug=slug, title=record['title'],
+                  description=record.get('description', ''))
+            for slug, record in records.items()
+            if slug not in self.groups
+        )
+        self.lookup(self.groups, Group, 'slug', records)
+
+    def image(self, name):
+        if not name:
+            return ''
+        storage = self.image_field.storage
+        if self.media_dir:
+            path = os.path.join(self.media_dir, name)
+            if os.path.isfile(path):
+                with open(path, 'rb') as file:
+                    return storage.save(self.image_field.generate_filename(
+                        None, os.path.basename(name)), File(file))
+        if storage.exists(name):
+            return name
+        self.counts['missing_image'] += 1
+        return ''
+
+    def create_posts(self, records):
+        self.lookup(self.users, User, 'username',
+                    [record['author'] for record in records])
+        self.lookup(self.groups, Group, 'slug',
+                    [record.get('group') for record in records])
+        posts = [
+            Post(
+                pk=record['id'] + self.post_offset,
+                author_id=self.users[record['author']],
+                group_id=self.groups.get(record.get('group')),
+                text=record['text'],
+                pub_date=record.get('pub_date') or self.now,
+                image=self.image(record.get('image')),
+            )
+            for record in records
+        ]
+        Post.objects.bulk_create(posts)
+        self.images.update(post.image.name for post in posts if post.image)
+
+    def create_comments(self, records):
+        self.lookup(self.users, User, 'username',
+                    [record['author'] for record in records])
+        comments = [
+            Comment(
+                pk=record['id'] + self.comment_offset,
+                post_id=record['post'] + self.post_offset,
+                author_id=self.users[record['author']],
+                parent_id=(record['parent'] + self.comment_offset
+                           if record.get('parent') else None),
+                text=record['text'],
+                created=record.get('created') or self.now,
+            )
+            for record in records
+        ]
+        self.check_ids(Post, {comment.post_id for comment in comments},
+                       self.post_offset)
+        self.check_ids(
+            Comment,
+            {comment.parent_id for comment in comments if comment.parent_id},
+            self.comment_offset, {comment.pk for comment in comments})
+        Comment.objects.bulk_create(comments)
+
+    def create_follows(self, records):
+        self.lookup(self.users, User, 'username', [
+            username for record in records
+            for username in (record['user'], record['author'])
+        ])
+        Follow.objects.bulk_create(
+            (Follow(user_id=self.users[record['user']],
+                    author_id=self.users[record['author']])
+             for record in records if record['user'] != record['author']),
+            ignore_conflicts=True,
+        )
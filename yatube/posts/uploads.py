@@ -0,0 +1,104 @@
+from functools import wraps
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import (FileUploadHandler, SkipFile,
+                                             StopUpload)
+from django.template.defaultfilters import filesizeformat
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image, UnidentifiedImageError
+
+HEADER_LIMIT = 1024 * 1024
+
+
+class ImageUploadHandler(FileUploadHandler):
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.errors = request.upload_errors
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        self.request_length = content_length
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        limit = settings.POST_IMAGE_UPLOAD_MAX_SIZE + HEADER_LIMIT
+        if self.request_length > limit:
+            self.errors[self.field_name] = self.too_large_message()
+            raise StopUpload(connection_reset=True)
+        self.header = b''
+        self.size = 0
+        self.file = TemporaryUploadedFile(
+            self.file_name, self.content_type, 0, self.charset,
+            self.content_type_extra)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > settings.POST_IMAGE_UPLOAD_MAX_SIZE:
+            self.reject(self.too_large_message())
+            raise StopUpload(connection_reset=True)
+        if self.header is not None:
+            self.header += raw_data
+            self.check_header()
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        if self.header is not None:
+            try:
+                self.check_header(complete=True)
+            except SkipFile:
+                return None
+        self.file.seek(0)
+        self.file.size = file_size
+        return self.file
+
+    def check_header(self, complete=False):
+        formats = settings.POST_IMAGE_UPLOAD_FORMATS
+        try:
+            with Image.open(BytesIO(self.header), formats=formats) as image:
+                width, height = image.size
+        except UnidentifiedImageError:
+            self.skip('Загрузите файл в формате JPEG, PNG, GIF или WebP.')
+        except Image.DecompressionBombError:
+            self.skip('Изображение слишком большое.')
+        except Exception:
+            if complete or len(self.header) >= HEADER_LIMIT:
+                self.skip('Файл повреждён или не является изображением.')
+            return
+        self.header = None
+        if (max(width, height) > settings.POST_IMAGE_MAX_DIMENSION
+                or width * height > settings.POST_IMAGE_MAX_PIXELS):
+            self.skip(f'Изображение слишком большое: {width}×{height}.')
+
+    def too_large_message(self):
+        limit = filesizeformat(settings.POST_IMAGE_UPLOAD_MAX_SIZE)
+        return f'Размер файла не должен превышать {limit}.'
+
+    def reject(self, message):
+        self.errors[self.field_name] = message
+        self.header = None
+        self.file.close()
+
+    def skip(self, message):
+        self.reject(message)
+        raise SkipFile()
+
+
+def stream_image_uploads(view):
+    protected_view = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_errors = {}
+        request.upload_handlers = [ImageUploadHandler(request)]
+        return protected_view(request, *args, **kwargs)
+    return wrapper
+
+
+def add_upload_errors(form, request):
+    if not form.is_bound:
+        return
+    for field, message in getattr(request, 'upload_errors', {}).items():
+        form.add_error(field if field in form.fields else None, message)
@@ -1,16 +1,26 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import api, async_views, views
+
+feed_views = async_views if settings.ASYNC_FEED_VIEWS else views
 
 app_name = 'posts'
 
 urlpatterns = [
-    path('', views.index, name='index'),
-    path('group/<slug:slug>/', views.group_posts, name='group_list'),
-    path('profile/<str:username>/', views.profile, name='profile'),
-    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('', feed_views.index, name='index'),
+    path('group/', views.group_index, name='group_index'),
+    path('group/<slug:slug>/', feed_views.group_posts, name='group_list'),
+    path('profile/<str:username>/', feed_views.profile, name='profile'),
+    path('search/', views.search, name='search'),
+    path('posts/<int:post_id>/', feed_views.post_detail,
+         name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path('posts/<int:post_id>/comments/', views.post_comments,
+         name='post_comments'),
+    path('posts/<int:post_id>/comments/<int:comment_id>/',
+         views.comment_thread, name='comment_thread'),
     path('posts/<int:post_id>/comment/',
          views.add_comment,
          name='add_comment'
@@ -26,4 +36,11 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    path('api/posts/', api.index, name='api_index'),
+    path('api/group/<slug:slug>/', api.group_posts, name='api_group_list'),
+    path('api/profile/<str:username>/', api.profile, name='api_profile'),
+    path('api/follow/', api.follow_index, name='api_follow_index'),
+    path('api/posts/<int:post_id>/', api.post_detail, name='api_post_detail'),
+    path('api/posts/<int:post_id>/comments/', api.comments,
+         name='api_comments'),
 ]
@@ -1,8 +1,176 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
+from django.db.models import Q
+
+POSTS_PER_PAGE = 10
+NUMBERED_PAGES_LIMIT = 10
+FEED_ORDERING = ('-pub_date', '-pk')
+COMMENTS_PER_PAGE = 20
+GROUPS_PER_PAGE = 20
+COMMENT_ORDERINGS = {
+    'oldest': ('created', 'pk'),
+    'newest': ('-created', '-pk'),
+}
+THREAD_ORDERING = ('path',)
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, model, ordering):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(ordering):
+            return None
+        if not all(isinstance(value, str) for value in values):
+            return None
+        return [
+            _get_field(model, name).to_python(value)
+            for name, value in zip(_field_names(ordering), values)
+        ]
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def _field_names(ordering):
+    return [name.lstrip('-') for name in ordering]
+
+
+def _get_field(model, name):
+    if name == 'pk':
+        return model._meta.pk
+    return model._meta.get_field(name)
+
+
+def _cursor_filter(ordering, values, forward):
+    condition = Q()
+    for index in reversed(range(len(ordering))):
+        name = ordering[index].lstrip('-')
+        descending = ordering[index].startswith('-')
+        lookup = 'lt' if descending == forward else 'gt'
+        step = Q(**{f'{name}__{lookup}': values[index]})
+        if index < len(ordering) - 1:
+            step |= Q(**{name: values[index]}) & condition
+        condition = step
+    if len(ordering) > 1:
+        name = ordering[0].lstrip('-')
+        lookup = 'lte' if ordering[0].startswith('-') == forward else 'gte'
+        condition &= Q(**{f'{name}__{lookup}': values[0]})
+    return condition
+
+
+def _reverse_ordering(ordering):
+    return [
+        name[1:] if name.startswith('-') else f'-{name}'
+        for name in ordering
+    ]
+
+
+class CursorPage:
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    def __init__(self, queryset, per_page, ordering=FEED_ORDERING):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+
+    def cursor_for(self, obj):
+        values = [
+            _get_field(obj, name).value_to_string(obj)
+            for name in _field_names(self.ordering)
+        ]
+        return encode_cursor(values)
+
+    def window(self, values=None, forward=True):
+        queryset = self.queryset
+        ordering = self.ordering
+        if values:
+            queryset = queryset.filter(
+                _cursor_filter(ordering, values, forward))
+        if not forward:
+            ordering = _reverse_ordering(ordering)
+        return queryset.order_by(*ordering)[:self.per_page + 1]
+
+    def page(self, after=None, before=None):
+        model = self.queryset.model
+        if before is not None:
+            values = decode_cursor(before, model, self.ordering)
+            if values is not None:
+                items = list(self.window(values, forward=False))
+                has_previous = len(items) > self.per_page
+                items = items[:self.per_page][::-1]
+                return self._build_page(items, True, has_previous)
+        values = after and decode_cursor(after, model, self.ordering)
+        items = list(self.window(values))
+        has_next = len(items) > self.per_page
+        items = items[:self.per_page]
+        return self._build_page(items, has_next, has_previous=bool(values))
+
+    def _build_page(self, items, has_next, has_previous):
+        next_cursor = previous_cursor = None
+        if items and has_next:
+            next_cursor = self.cursor_for(items[-1])
+        if items and has_previous:
+            previous_cursor = self.cursor_for(items[0])
+        return CursorPage(items, next_cursor, previous_cursor)
+
+
+def use_cursor(queryset, request, per_page=POSTS_PER_PAGE):
+    if 'after' in request.GET or 'before' in request.GET:
+        return True
+    if 'page' in request.GET:
+        return False
+    offset = per_page * NUMBERED_PAGES_LIMIT
+    return queryset.order_by()[offset:offset + 1].exists()
 
 
-def paginator(queryset, request):
-    paginator = Paginator(queryset, 10)
+def paginator(queryset, request, per_page=POSTS_PER_PAGE,
+              ordering=FEED_ORDERING):
+    if use_cursor(queryset, request, per_page):
+        page_obj = CursorPaginator(queryset, per_page, ordering).page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+        )
+        return {
+            'paginator': None,
+            'page_number': None,
+            'page_obj': page_obj,
+        }
+    paginator = Paginator(queryset.order_by(*ordering), per_page)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return {
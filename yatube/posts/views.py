@@ -1,55 +1,191 @@
+from collections import defaultdict
+from urllib.parse import urlencode
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.db import IntegrityError, transaction
+from django.db.models import OuterRef, Subquery, prefetch_related_objects
 from django.shortcuts import redirect, render, get_object_or_404
-from django.views.decorators.cache import cache_page
 from django.urls import reverse
 
-from .models import Follow, Group, Post, User
+from core.db.routers import pin_primary
+from users.models import get_profile
+
+from .cache import cache_feed_page, conditional_page
+from .models import Comment, Follow, Group, Post, User
 from .forms import CommentForm, PostForm
-from .utils import paginator
+from .groups import get_group_or_404, registry
+from .search import get_backend
+from .thumbnails import schedule as schedule_thumbnails
+from .uploads import add_upload_errors, stream_image_uploads
+from .timeline import timeline
+from .utils import (COMMENT_ORDERINGS, COMMENTS_PER_PAGE, GROUPS_PER_PAGE,
+                    POSTS_PER_PAGE, THREAD_ORDERING, CursorPaginator,
+                    paginator)
+
+
+def index_scopes():
+    return ['feed']
+
+
+def group_index_scopes():
+    return ['feed', 'groups']
+
+
+def group_scopes(slug):
+    group = registry.by_slug(slug)
+    return group and [f'feed:group:{group.pk}']
+
+
+def profile_scopes(username):
+    pk = User.objects.filter(
+        username=username).values_list('pk', flat=True).first()
+    return pk and [f'feed:author:{pk}']
 
 
-@cache_page(20, key_prefix='index_page')
+def comment_scopes(post_id):
+    return [f'post:{post_id}', f'feed:post:{post_id}']
+
+
+def thread_scopes(post_id, comment_id):
+    return comment_scopes(post_id)
+
+
+def post_detail_scopes(post_id):
+    author_id = Post.objects.filter(
+        pk=post_id).values_list('author_id', flat=True).first()
+    return author_id and [*comment_scopes(post_id), f'feed:author:{author_id}']
+
+
+@cache_feed_page(index_scopes)
 def index(request):
-    context = paginator(Post.objects.all(), request)
+    context = paginator(Post.objects.feed(), request)
     template = 'posts/index.html'
     return render(request, template, context)
 
 
+@cache_feed_page(group_index_scopes)
+def group_index(request):
+    page_obj = Paginator(registry.all(), GROUPS_PER_PAGE).get_page(
+        request.GET.get('page'))
+    latest = Post.objects.filter(group=OuterRef('pk')).order_by(
+        '-pub_date', '-pk').values('pk')[:1]
+    stats = list(Group.objects.filter(
+        pk__in=[group.pk for group in page_obj]).values_list(
+        'pk', 'posts_count', Subquery(latest)))
+    counts = {pk: count for pk, count, _ in stats}
+    latest_ids = {pk: post_id for pk, _, post_id in stats}
+    posts = Post.objects.feed().in_bulk(
+        [pk for pk in latest_ids.values() if pk])
+    context = {
+        'page_obj': page_obj,
+        'entries': [
+            {
+                'group': group,
+                'posts_count': counts.get(group.pk, 0),
+                'latest': posts.get(latest_ids.get(group.pk)),
+            }
+            for group in page_obj
+        ],
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
+@conditional_page(group_scopes)
+@cache_feed_page(group_scopes)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.content.all()
+    group = get_group_or_404(slug)
     context = {
         'group': group,
-        'posts': posts,
     }
-    context.update(paginator(group.content.all(), request))
+    context.update(paginator(group.content.feed(), request))
     template = 'posts/group_list.html'
     return render(request, template, context)
 
 
+@conditional_page(profile_scopes)
+@cache_feed_page(profile_scopes)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    count = author.posts.count()
+    author = get_object_or_404(
+        User.objects.select_related('profile'), username=username)
     following = request.user.is_authenticated and author.following.filter(
         user=request.user).exists()
     context = {
-        'count': count,
+        'count': get_profile(author).posts_count,
         'author': author,
         'following': following
     }
-    context.update(paginator(author.posts.all(), request))
+    context.update(paginator(author.posts.feed(), request))
     template = 'posts/profile.html'
     return render(request, template, context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    results = get_backend().search(query, settings.SEARCH_RESULTS_LIMIT)
+    page_obj = Paginator(results, POSTS_PER_PAGE).get_page(
+        request.GET.get('page'))
+    posts = Post.objects.feed().in_bulk(page_obj.object_list)
+    page_obj.object_list = [
+        posts[pk] for pk in page_obj.object_list if pk in posts
+    ]
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'extra_query': urlencode({'q': query}),
+    }
+    return render(request, 'posts/search.html', context)
+
+
+def thread_paginator(replies):
+    return CursorPaginator(replies, COMMENTS_PER_PAGE, THREAD_ORDERING)
+
+
+def with_replies(roots):
+    replies = Comment.objects.reply_previews(
+        [root.pk for root in roots], settings.COMMENT_REPLIES_PREVIEW)
+    prefetch_related_objects(replies, 'author')
+    threads = defaultdict(list)
+    for reply in replies:
+        threads[reply.thread_id].append(reply)
+    comments = []
+    for root in roots:
+        thread = threads[root.pk]
+        root.hidden_replies = thread and thread[0].thread_size - len(thread)
+        if root.hidden_replies:
+            root.replies_cursor = thread_paginator(
+                Comment.objects.thread(root.pk)).cursor_for(thread[-1])
+        comments += [root, *thread]
+    return comments
+
+
+def comment_page(request, post_id):
+    order = request.GET.get('comments')
+    if order not in COMMENT_ORDERINGS:
+        order = 'oldest'
+    roots = Comment.objects.filter(
+        post_id=post_id, depth=0).select_related('author')
+    page = CursorPaginator(
+        roots, COMMENTS_PER_PAGE, COMMENT_ORDERINGS[order]
+    ).page(after=request.GET.get('after'))
+    page.object_list = with_replies(page.object_list)
+    return {
+        'post_id': post_id,
+        'comments': page,
+        'comments_order': order,
+    }
+
+
+@conditional_page(post_detail_scopes)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__profile', 'group'), pk=post_id)
     pub_date = post.pub_date
     post_title = post.text[:30]
     author = post.author
-    author_posts = author.posts.all().count()
-    comments = post.comments.all()
-    form = CommentForm()
+    author_posts = get_profile(author).posts_count
+    form = CommentForm(initial={'parent': request.GET.get('reply_to')})
     context = {
         'post': post,
         'post_title': post_title,
@@ -57,45 +193,73 @@ def post_detail(request, post_id):
         'author_posts': author_posts,
         'pub_date': pub_date,
         'form': form,
-        'comments': comments
     }
+    context.update(comment_page(request, post.pk))
     template = 'posts/post_detail.html'
     return render(request, template, context)
 
 
+@conditional_page(comment_scopes)
+def post_comments(request, post_id):
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    return render(request, 'posts/includes/comments.html',
+                  comment_page(request, post_id))
+
+
+@conditional_page(thread_scopes)
+def comment_thread(request, post_id, comment_id):
+    root = get_object_or_404(
+        Comment.objects.only('pk'), pk=comment_id, post_id=post_id, depth=0)
+    replies = Comment.objects.thread(root.pk).filter(
+        depth__gt=0).select_related('author')
+    context = {
+        'post_id': post_id,
+        'thread_id': root.pk,
+        'comments': thread_paginator(replies).page(
+            after=request.GET.get('after')),
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
+@stream_image_uploads
 @login_required
 def post_create(request):
     form = PostForm(request.POST or None,
                     files=request.FILES or None)
+    add_upload_errors(form, request)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        pin_primary(request)
+        schedule_thumbnails(post)
         return redirect('posts:profile', username=request.user.username)
-    groups = Group.objects.all()
     template = 'posts/create_post.html'
-    context = {'form': form, 'groups': groups}
+    context = {'form': form}
     return render(request, template, context)
 
 
+@stream_image_uploads
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     author = post.author
-    groups = Group.objects.all()
     form = PostForm(request.POST or None,
                     files=request.FILES or None,
                     instance=post)
+    add_upload_errors(form, request)
     template = 'posts/create_post.html'
     if request.user != author:
         return redirect('posts:post_detail', post_id)
     if request.method == 'POST' and form.is_valid():
         post = form.save()
+        pin_primary(request)
+        if 'image' in form.changed_data:
+            schedule_thumbnails(post)
         return redirect('posts:post_detail', post_id)
     context = {
         'form': form,
         'post': post,
-        'groups': groups,
     }
     return render(request, template, context)
 
@@ -103,19 +267,21 @@ def post_edit(request, post_id):
 @login_required
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
-    form = CommentForm(request.POST or None)
+    form = CommentForm(request.POST or None, post=post)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
         comment.save()
+        pin_primary(request)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    context = paginator(post_list, request)
+    context = paginator(timeline(request.user), request)
+    page_obj = context['page_obj']
+    page_obj.object_list = [entry.post for entry in page_obj]
     return render(request, 'posts/follow.html', context)
 
 
@@ -125,7 +291,12 @@ def profile_follow(request, username):
     user = request.user
     following = Follow.objects.filter(user=user, author=author)
     if user != author and not following.exists():
-        Follow.objects.create(user=user, author=author)
+        try:
+            with transaction.atomic():
+                Follow.objects.create(user=user, author=author)
+        except IntegrityError:
+            pass
+        pin_primary(request)
     return redirect(
         reverse(
             'posts:profile',
@@ -141,6 +312,7 @@ def profile_unfollow(request, username):
     following = Follow.objects.filter(user=user, author=author)
     if user != author and following.exists():
         following.delete()
+        pin_primary(request)
     return redirect(
         reverse(
             'posts:profile',
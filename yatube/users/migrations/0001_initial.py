@@ -0,0 +1,48 @@
+# Generated by Django 2.2.19 on 2026-10-17 04:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+FILL_PROFILES = '''
+INSERT INTO users_profile (
+    user_id, posts_count, followers_count, following_count
+)
+SELECT
+    auth_user.id,
+    (SELECT COUNT(*) FROM posts_post
+     WHERE posts_post.author_id = auth_user.id),
+    (SELECT COUNT(*) FROM posts_follow
+     WHERE posts_follow.author_id = auth_user.id),
+    (SELECT COUNT(*) FROM posts_follow
+     WHERE posts_follow.user_id = auth_user.id)
+FROM auth_user
+'''
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0008_post_comments_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Profile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Подписок')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='profile', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Профиль',
+                'verbose_name_plural': 'Профили',
+            },
+        ),
+        migrations.RunSQL(FILL_PROFILES, migrations.RunSQL.noop),
+    ]
@@ -5,7 +5,7 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
 # Quick-start development settings - unsuitable for production
-# See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
+# See https://docs.djangoproject.com/en/3.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = ')o&fqdtssqqwbn+pfx&hwuwyhn98vx%1ehstubzawdpj0tdo(*j-eib8^u'
@@ -38,11 +38,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.db.inspection.QueryInspectorMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.db.routers.PrimaryPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -54,7 +57,7 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -73,18 +76,47 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
 # Database
-# https://docs.djangoproject.com/en/2.2/ref/settings/#databases
+# https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': int(os.getenv('YATUBE_DB_CONN_MAX_AGE', 600)),
+        'PRAGMAS': {
+            pragma: int(os.environ[variable])
+            for pragma, variable in (
+                ('busy_timeout', 'YATUBE_DB_BUSY_TIMEOUT'),
+                ('cache_size', 'YATUBE_DB_CACHE_SIZE'),
+                ('mmap_size', 'YATUBE_DB_MMAP_SIZE'),
+            )
+            if variable in os.environ
+        },
     }
 }
 
+DATABASE_REPLICAS = []
+for number, path in enumerate(
+        filter(None, os.getenv('YATUBE_DB_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+REPLICA_MODELS = (
+    'posts.Post',
+    'posts.Group',
+    'posts.Comment',
+    'posts.Follow',
+)
+REPLICA_PIN_SECONDS = int(os.getenv('YATUBE_DB_PIN_SECONDS', 5))
+
 
 # Password validation
-# https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
+# https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -103,13 +135,26 @@ AUTH_PASSWORD_VALIDATORS = [
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.TieredCache',
+        'OPTIONS': {
+            'L2': {
+                'BACKEND': os.getenv(
+                    'YATUBE_CACHE_BACKEND',
+                    'django.core.cache.backends.locmem.LocMemCache'
+                ),
+                'LOCATION': os.getenv('YATUBE_CACHE_LOCATION', ''),
+            },
+            'L1_MAX_ENTRIES': int(os.getenv('YATUBE_CACHE_L1_ENTRIES', 1000)),
+            'L1_TIMEOUT': float(os.getenv('YATUBE_CACHE_L1_TIMEOUT', 5)),
+            'L1_EXCLUDE': ('posts:version:',),
+            'LOCK_SETTLE': float(os.getenv('YATUBE_CACHE_LOCK_SETTLE', 0)),
+        },
     }
 }
 
 
 # Internationalization
-# https://docs.djangoproject.com/en/2.2/topics/i18n/
+# https://docs.djangoproject.com/en/3.2/topics/i18n/
 
 LANGUAGE_CODE = 'ru-ru'
 
@@ -123,10 +168,12 @@ USE_TZ = True
 
 
 # Static files (CSS, JavaScript, Images)
-# https://docs.djangoproject.com/en/2.2/howto/static-files/
+# https://docs.djangoproject.com/en/3.2/howto/static-files/
 
 STATIC_URL = '/static/'
 
+DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
@@ -137,3 +184,35 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+ASYNC_FEED_VIEWS = os.getenv('YATUBE_ASYNC_VIEWS', '') == '1'
+ASYNC_DB_WORKERS = int(os.getenv('YATUBE_ASYNC_DB_WORKERS', 8))
+
+METRICS_SAMPLE_RATE = float(os.getenv('YATUBE_METRICS_SAMPLE_RATE', 0.1))
+METRICS_WINDOW = int(os.getenv('YATUBE_METRICS_WINDOW', 1000))
+
+QUERY_INSPECTION = os.getenv(
+    'YATUBE_QUERY_INSPECTION', '1' if DEBUG else '') == '1'
+SLOW_QUERY_MS = float(os.getenv('YATUBE_SLOW_QUERY_MS', 100))
+QUERY_REPEAT_THRESHOLD = int(os.getenv('YATUBE_QUERY_REPEAT_THRESHOLD', 5))
+
+COMMENT_MAX_DEPTH = 5
+COMMENT_REPLIES_PREVIEW = 3
+
+TIMELINE_FANOUT_LIMIT = 1000
+TIMELINE_BACKFILL = 100
+
+POSTS_SEARCH_BACKEND = 'posts.search.SQLiteFTSBackend'
+SEARCH_RESULTS_LIMIT = 1000
+
+THUMBNAIL_BACKEND = 'posts.thumbnails.PostThumbnailBackend'
+THUMBNAIL_ASYNC = True
+THUMBNAIL_WORKERS = 2
+POST_IMAGE_MAX_SIZE = 2048
+POST_IMAGE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+POST_IMAGE_UPLOAD_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+POST_IMAGE_MAX_DIMENSION = 10000
+POST_IMAGE_MAX_PIXELS = 40_000_000
+POST_IMAGE_GEOMETRY = (960, 339)
+POST_IMAGE_WIDTHS = (480, 960, 1440)
+POST_IMAGE_FORMATS = ('AVIF', 'WEBP', 'JPEG')
@@ -9,7 +9,8 @@ urlpatterns = [
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('', include('posts.urls', namespace='posts')),
-    path('about/', include('about.urls', namespace='about'))
+    path('about/', include('about.urls', namespace='about')),
+    path('stats/', include('core.urls', namespace='core')),
 ]
 
 handler404 = 'core.views.page_not_found'